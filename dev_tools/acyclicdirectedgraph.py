@@ -4,7 +4,11 @@ Email: danaukes<at>asu.edu.
 Please see LICENSE for full license.
 """
 
-import numpy
+import heapq
+
+
+class CycleError(Exception):
+    pass
 
 
 class Node(object):
@@ -21,106 +25,189 @@ class Node(object):
         self.network = network
 
     def ancestors(self):
-        return self.network.itemparents(self.network.B, self)
+        return self.network.itemancestors(self)
 
     def decendents(self):
-        return self.network.itemchildren(self.network.B, self)
-        
+        return self.network.itemdecendents(self)
+
     def parents(self):
-        return self.network.itemparents(self.network.A, self)
+        return self.network.itemparents(self)
 
     def children(self):
-        return self.network.itemchildren(self.network.A, self)
+        return self.network.itemchildren(self)
 
 
 class AcyclicDirectedGraph(object):
 
-    '''Graph which holds the methods for an acyclic directed graph'''
+    '''
+    Graph which holds the methods for an acyclic directed graph.
+    Connections are stored as adjacency sets; ancestors, decendents and the
+    topological order are computed on demand and kept until the graph changes.
+    '''
 
     def __init__(self, nodes=None, connections=None):
         self.nodes = []
-        self.connections = []
-        self.A = numpy.array([[]])
+        self.parentsets = {}
+        self.childsets = {}
+        self.clear_closure()
         if nodes is not None:
             self.addnodes(nodes)
             if connections is not None:
                 self.addconnections(connections)
 
+    @property
+    def connections(self):
+        return [(parent, child) for child in self.nodes for parent in self.parentsets[child]]
+
+    def clear_closure(self):
+        self.ancestorsets = {}
+        self.decendentsets = {}
+        self._order = None
+
     def sequence_complete_valid(self, sequence):
         '''checks whether a given sequence's nodes have all their parents in the subsequence as well'''
+        position = dict([(node, ii) for ii, node in enumerate(sequence)])
+        if len(position) != len(sequence):
+            return False
+        # it is enough to check direct connections; ancestors and decendents follow by induction
         for ii, node in enumerate(sequence):
-            above = set(sequence[:ii])
-            below = set(sequence[ii + 1:])
-
-            ancestors = set(node.ancestors())
-            decendents = set(node.decendents())
-
-            if len(ancestors.difference(above)) > 0:
-                return False
-            if len(decendents.difference(below)) > 0:
-                return False
-            if len(above.intersection(decendents)) > 0:
-                return False
-            if len(below.intersection(ancestors)) > 0:
-                return False
+            for parent in self.parentsets[node]:
+                if position.get(parent, ii) >= ii:
+                    return False
+            for child in self.childsets[node]:
+                if position.get(child, ii) <= ii:
+                    return False
         return True
 
-    def process(self):
-        self.forwardindex, self.reverseindex = self.build_indeces(self.nodes)
-        self.A, self.B = self.buildAB(
-            self.nodes, self.connections, self.forwardindex)
-
     def addnodes(self, nodes):
         '''add a list of nodes to the network'''
         for node in nodes:
             if isinstance(node, Node):
                 node.setnetwork(self)
-        self.nodes.extend(nodes)
-        self.nodes = list(set(self.nodes))
-        self.process()
+            if node not in self.parentsets:
+                self.nodes.append(node)
+                self.parentsets[node] = set()
+                self.childsets[node] = set()
+                self._order = None
+
+    def removenodes(self, nodes):
+        '''remove a list of nodes and all of their connections from the network'''
+        nodes = set(nodes).intersection(self.parentsets)
+        if not nodes:
+            return
+        for node in nodes:
+            for parent in self.parentsets.pop(node):
+                if parent not in nodes:
+                    self.childsets[parent].discard(node)
+            for child in self.childsets.pop(node):
+                if child not in nodes:
+                    self.parentsets[child].discard(node)
+        self.nodes = [node for node in self.nodes if node not in nodes]
+        self.clear_closure()
 
     def addconnections(self, connections):
-        '''add a list of connections to the network and recalculate internal stuff'''
+        '''add a list of connections to the network.  raises CycleError and leaves the network unchanged if a cycle would be formed'''
+        added = []
+        for parent, child in connections:
+            if parent in self.parentsets and child in self.parentsets:
+                if parent not in self.parentsets[child]:
+                    self.parentsets[child].add(parent)
+                    self.childsets[parent].add(child)
+                    added.append((parent, child))
+        if not added:
+            return
+        self.clear_closure()
+        try:
+            self.topological_order()
+        except CycleError:
+            self.removeconnections(added)
+            raise
+
+    def removeconnections(self, connections):
+        '''remove a list of connections from the network'''
+        removed = False
         for parent, child in connections:
-            if parent in self.nodes and child in self.nodes:
-                if parent in child.decendents():
-                    raise Exception
-                else:
-                    self.connections.append((parent, child))
-        self.connections = list(set(self.connections))
-        self.process()
-
-    @staticmethod
-    def build_indeces(nodes):
-        forwardindex = dict([(node, ii) for ii, node in enumerate(nodes)])
-        reverseindex = dict([(ii, node) for ii, node in enumerate(nodes)])
-        return forwardindex, reverseindex
-
-    @staticmethod
-    def buildAB(nodes, connections, forwardindex):
-        '''build internal representation of directed connections'''
-        m = len(nodes)
-        A = numpy.zeros((m, m), dtype=bool)
-        for connection in connections:
-            A[forwardindex[connection[0]], forwardindex[connection[1]]] = 1
-        B = A.copy()
-        lastB = numpy.zeros(A.shape)
-        while not (B == lastB).all():
-            lastB = B
-            B = B.dot(A) + B
-        return A, B
-
-    def itemparents(self, C, child):
-        '''return the parents of a particular node.  The input connection matrix C determines what type of relationship'''
-        return self.itemchildren(C.T, child)
-
-    def itemchildren(self, C, parent):
-        '''return the children of a particular node.  The input connection matrix C determines what type of relationship'''
-#        array = numpy.array(C)
-        ii = self.forwardindex[parent]
-        itemparents = C[ii, :].nonzero()[0].tolist()
-        itemparents = [self.reverseindex[item] for item in itemparents]
-        return itemparents
+            if parent in self.parentsets.get(child, ()):
+                self.parentsets[child].discard(parent)
+                self.childsets[parent].discard(child)
+                removed = True
+        if removed:
+            self.clear_closure()
+
+    def sync(self, nodes, connections):
+        '''bring the network in line with a complete list of nodes and connections, only changing what differs'''
+        self.removenodes(set(self.parentsets).difference(nodes))
+        self.addnodes(nodes)
+        if self.nodes != list(nodes) and len(self.nodes) == len(nodes):
+            self.nodes = list(nodes)
+            self._order = None
+        new = set(connections)
+        self.removeconnections(set(self.connections).difference(new))
+        self.addconnections(new)
+        return self
+
+    def topological_order(self):
+        '''return the nodes ordered so that every node comes after all of its parents.  ties keep the order nodes were added in'''
+        if self._order is None:
+            position = dict([(node, ii) for ii, node in enumerate(self.nodes)])
+            waiting = dict([(node, len(self.parentsets[node])) for node in self.nodes])
+            ready = [ii for ii, node in enumerate(self.nodes) if not waiting[node]]
+            order = []
+            while ready:
+                node = self.nodes[heapq.heappop(ready)]
+                order.append(node)
+                for child in self.childsets[node]:
+                    waiting[child] -= 1
+                    if not waiting[child]:
+                        heapq.heappush(ready, position[child])
+            if len(order) != len(self.nodes):
+                raise CycleError
+            self._order = order
+            self._index = dict([(node, ii) for ii, node in enumerate(order)])
+        return self._order
+
+    def sort(self, nodes):
+        '''sort a collection of nodes in topological order'''
+        self.topological_order()
+        return sorted(nodes, key=self._index.__getitem__)
+
+    def closure(self, node, adjacency, memo):
+        '''every node reachable from node along adjacency, reusing and filling memo'''
+        try:
+            return memo[node]
+        except KeyError:
+            pass
+        found = set()
+        stack = list(adjacency[node])
+        while stack:
+            item = stack.pop()
+            if item in found:
+                continue
+            found.add(item)
+            if item in memo:
+                found.update(memo[item])
+            else:
+                stack.extend(adjacency[item])
+        memo[node] = found
+        return found
+
+    def ancestorset(self, node):
+        return self.closure(node, self.parentsets, self.ancestorsets)
+
+    def decendentset(self, node):
+        return self.closure(node, self.childsets, self.decendentsets)
+
+    def itemancestors(self, node):
+        return self.sort(self.ancestorset(node))
+
+    def itemdecendents(self, node):
+        return self.sort(self.decendentset(node))
+
+    def itemparents(self, node):
+        return self.sort(self.parentsets[node])
+
+    def itemchildren(self, node):
+        return self.sort(self.childsets[node])
 
 if __name__ == '__main__':
     pass
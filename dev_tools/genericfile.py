@@ -205,6 +205,14 @@ class GenericFile(object):
         new = yaml.load(yaml.dump(self.copy(identical)))
         return new
 
+    def clone(self, identical=True):
+        '''deep copy, like copy_yaml, without the round trip through yaml text'''
+        import pickle
+        try:
+            return pickle.loads(pickle.dumps(self.copy(identical), pickle.HIGHEST_PROTOCOL))
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return self.copy_yaml(identical)
+
     @staticmethod
     def slugify(string):
         string = string.replace('_','-')
@@ -6,16 +6,21 @@ Please see LICENSE for full license.
 """
 from . import body_detection
 from . import csg_shapely
+from . import csg_vectorized
 from . import design_documentation
+from . import fingerprint
 from . import getjoints
 from . import keepout
 from . import manufacturing_functions
+from . import mass_properties
 from . import minimal_enclosing_circle
 from . import modify_device
 from . import morphology
 from . import points
+from . import profiling
 from . import python_syntax_formatter
 from . import removability
+from . import spatial_index
 from . import spline_functions
 from . import toolclearance
 from . import triangulate
@@ -23,73 +23,66 @@ def sort_lams(lams, values):
 
 
 def find(generic_laminate):
+    '''split a generic laminate into bodies, sorted by their lower left corners'''
     generic = generic_laminate.geoms
     layerdef = generic_laminate.layerdef
     from popupcad.filetypes.laminate import Laminate
+    from popupcad.algorithms.spatial_index import SpatialIndex
 
-    layer_dict = dict([(geom.id, layer) for layer, geoms in generic.items() for geom in geoms])
-    geom_dict = dict([(geom.id, geom) for layer, geoms in generic.items() for geom in geoms])
-    geom_dict_whole = geom_dict.copy()
+    entries = [(layer, geom) for layer, geoms in generic.items() for geom in geoms]
+    shapely_geoms = [geom.to_shapely(scaling = popupcad.csg_processing_scaling) if geom.is_valid_bool() else None for layer, geom in entries]
+
+    layer_members = {}
+    for ii, (layer, geom) in enumerate(entries):
+        if shapely_geoms[ii] is not None:
+            layer_members.setdefault(layer, []).append(ii)
+
+    order = dict([(layer, ii) for ii, layer in enumerate(layer_members)])
+    parents = list(range(len(entries)))
+    indices = {}
+    for layer, members in layer_members.items():
+        for neighbor in layerdef.connected_neighbors(layer):
+            # each pair of layers is tested once, from the layer listed first
+            if neighbor not in layer_members or order[neighbor] < order[layer]:
+                continue
+            neighbor_members = layer_members[neighbor]
+            try:
+                index = indices[neighbor]
+            except KeyError:
+                index = indices[neighbor] = SpatialIndex([shapely_geoms[jj] for jj in neighbor_members])
+            for ii, jj in index.pairs_intersecting([shapely_geoms[ii] for ii in members]):
+                union(parents, members[ii], neighbor_members[jj])
+
+    components = {}
+    for ii in range(len(entries)):
+        components.setdefault(root(parents, ii), []).append(ii)
 
     laminates = []
     values = []
-    while len(geom_dict) > 0:
+    for members in sorted(components.values()):
         laminate = Laminate(layerdef)
-        key = list(geom_dict.keys())[0]
-        gs = findallconnectedneighborgeoms(key,generic_laminate,geom_dict,layerdef)
-        geom_mins = numpy.array(
-            [find_minimum_xy(geom_dict_whole[geom_id]) for geom_id in gs])
+        geom_mins = numpy.array([find_minimum_xy(entries[ii][1]) for ii in members])
         values.append(tuple(geom_mins.min(0)))
-        for item_id in gs:
-            geom = geom_dict_whole[item_id]
-            if geom.is_valid_bool():
-                laminate.insertlayergeoms(layer_dict[item_id], [geom.to_shapely(scaling = popupcad.csg_processing_scaling)])
+        for layer in layerdef.layers:
+            geoms = [shapely_geoms[ii] for ii in members if entries[ii][0] == layer and shapely_geoms[ii] is not None]
+            if geoms:
+                laminate.insertlayergeoms(layer, geoms)
         laminates.append(laminate)
     laminates = sort_lams(laminates, values)
     return laminates
 
 
-def findallconnectedneighborgeoms(
-        geomid,
-        generic_laminate,
-        geom_dict,
-        layerdef):
-    '''find all the connected shapes'''
-    connectedgeomids = [geomid]
-    testids = [geomid]
-    while len(testids) > 0:
-        result = findconnectedneighborgeoms(
-            testids.pop(),
-            generic_laminate,
-            geom_dict,
-            layerdef)
-        result = list(set(result) - set(connectedgeomids))
-        testids.extend(result)
-        connectedgeomids.extend(result)
-    [geom_dict.pop(item) for item in connectedgeomids]
-    return connectedgeomids
-
-
-def findconnectedneighborgeoms(geomid, generic_laminate, geom_dict, layerdef):
-    '''find geoms in neighboring layers which are overlapping'''
-    validneighbors = []
-    geom = geom_dict[geomid]
-    if geom.is_valid_bool():
-        geom = geom.to_shapely(scaling = popupcad.csg_processing_scaling)
-        layer = findgeomlayerinstep(geomid, generic_laminate)
-        neighbors = layerdef.connected_neighbors(layer)
-        for neighbor in neighbors:
-            for item in generic_laminate.geoms[neighbor]:
-                if item.is_valid_bool():
-                    shapelygeom = item.to_shapely(scaling = popupcad.csg_processing_scaling)
-                    result = geom.intersection(shapelygeom)
-                    if not result.is_empty:
-                        validneighbors.append(item.id)
-    return validneighbors
-
-
-def findgeomlayerinstep(geomid, generic_laminate):
-    '''Find the layer of a laminate a given shape is in'''
-    for layer, geoms in generic_laminate.geoms.items():
-        if geomid in [geom.id for geom in geoms]:
-            return layer
+def root(parents, ii):
+    '''representative of the set containing ii, halving the path on the way'''
+    while parents[ii] != ii:
+        parents[ii] = parents[parents[ii]]
+        ii = parents[ii]
+    return ii
+
+
+def union(parents, ii, jj):
+    ii = root(parents, ii)
+    jj = root(parents, jj)
+    if ii != jj:
+        parents[max(ii, jj)] = min(ii, jj)
+
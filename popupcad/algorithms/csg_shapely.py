@@ -5,9 +5,15 @@ Email: danaukes<at>asu.edu.
 Please see LICENSE for full license.
 """
 
+import contextlib
+import logging
+import threading
 import shapely.geometry as sg
 import popupcad
 
+logger = logging.getLogger(__name__)
+_context = threading.local()
+
 filter_list = [sg.Polygon,sg.LineString,sg.Point]
 
 class GeometryNotHandled(Exception):
@@ -81,16 +87,87 @@ def to_generic(entity):
     else:
         raise GeometryNotHandled()
     return subclass(exterior, interiors)
-        
+
+def to_generic_list(entities):
+    '''convert many entities at once, building array shapes straight from their coordinate arrays'''
+    from popupcad.algorithms import csg_vectorized
+    scaling = 1/popupcad.csg_processing_scaling
+    if csg_vectorized.available:
+        return csg_vectorized.to_generic(entities, scaling)
+    return [to_generic_array(entity, scaling) for entity in entities]
+
+def to_generic_array(entity, scaling):
+    import numpy
+    from popupcad.filetypes.arrayshapes import ArrayPoly, ArrayPolyline
+
+    if isinstance(entity, sg.Polygon):
+        exterior = numpy.asarray(entity.exterior.coords)*scaling
+        interiors = [numpy.asarray(interior.coords)*scaling for interior in entity.interiors]
+        return ArrayPoly(exterior, interiors)
+    elif isinstance(entity, sg.LineString):
+        return ArrayPolyline(numpy.asarray(entity.coords)*scaling, [])
+    return to_generic(entity)
+
+@contextlib.contextmanager
+def operation_context(operation):
+    '''name operation in any fallback warnings raised while it generates'''
+    previous = getattr(_context, 'operation', None)
+    _context.operation = operation
+    try:
+        yield
+    finally:
+        _context.operation = previous
+
+
+def log_fallback():
+    popupcad.algorithms.profiling.count('unary_union_fallback')
+    operation = getattr(_context, 'operation', None)
+    if operation is None:
+        logger.warning('Unary Union Failed.  Falling Back...')
+    else:
+        logger.warning('Unary Union Failed in %s.  Falling Back...', operation)
+
+
+def precision_grid():
+    '''spacing of the grid geometry is snapped to in precision mode: geometry_round_value decimal places, in csg units'''
+    return popupcad.csg_processing_scaling * 10 ** (-popupcad.geometry_round_value)
+
+
+def snap_to_grid(geom, grid=None):
+    '''round every coordinate of geom to the precision grid, keeping the result valid'''
+    if grid is None:
+        grid = precision_grid()
+    try:
+        from shapely import set_precision
+    except ImportError:
+        import numpy
+        import shapely.ops as so
+        from shapely.validation import make_valid
+
+        def round_coords(x, y, z=None):
+            return numpy.round(numpy.array(x) / grid) * grid, numpy.round(numpy.array(y) / grid) * grid
+        snapped = so.transform(round_coords, geom)
+        if not snapped.is_valid:
+            snapped = make_valid(snapped)
+        return snapped
+    return set_precision(geom, grid)
+
+
 def unary_union_safe(listin):
     '''try to perform a unary union.  if that fails, fall back to iterative union'''
     import shapely
     import shapely.ops as so
 
+    popupcad.algorithms.profiling.count('unary_union')
+    if popupcad.csg_precision_mode:
+        listin = [snap_to_grid(item) for item in listin]
     try:
-        return so.unary_union(listin)
+        result = so.unary_union(listin)
+        if popupcad.csg_precision_mode:
+            result = snap_to_grid(result)
+        return result
     except (shapely.geos.TopologicalError, ValueError):
-        print('Unary Union Failed.  Falling Back...')
+        log_fallback()
         workinglist = listin[:]
         try:
             result = workinglist.pop(0)
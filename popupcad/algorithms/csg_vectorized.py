@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Written by Daniel M. Aukes and CONTRIBUTORS
+Email: danaukes<at>asu.edu.
+Please see LICENSE for full license.
+"""
+
+import numpy
+import shapely
+import popupcad
+
+# the array functions used here were added in shapely 2
+available = int(shapely.__version__.split('.')[0]) >= 2
+
+# geos type ids: point, linestring, linearring, polygon, then the multi types and geometrycollection
+handled_type_ids = [0, 1, 2, 3]
+collection_type_ids = [4, 5, 6, 7]
+
+
+def as_array(geoms):
+    '''a 1d object array of geometries'''
+    if isinstance(geoms, numpy.ndarray):
+        return geoms
+    array = numpy.empty(len(geoms), dtype=object)
+    array[:] = geoms
+    return array
+
+
+def extract_individual_entities(array):
+    '''explode collections, however deeply nested, into their parts'''
+    array = as_array(array)
+    while numpy.isin(shapely.get_type_id(array), collection_type_ids).any():
+        array = shapely.get_parts(array)
+    return array
+
+
+def condition_shapely_entities(*entities):
+    '''array equivalent of csg_shapely.condition_shapely_entities'''
+    array = extract_individual_entities(entities)
+    keep = numpy.isin(shapely.get_type_id(array), handled_type_ids) & ~shapely.is_empty(array)
+    return array[keep]
+
+
+def unary_union_safe(array):
+    '''union an array of geometries.  if that fails, fall back to iterative union'''
+    popupcad.algorithms.profiling.count('unary_union')
+    if popupcad.csg_precision_mode:
+        grid = popupcad.algorithms.csg_shapely.precision_grid()
+        array = shapely.set_precision(array, grid)
+    try:
+        if popupcad.csg_precision_mode:
+            return shapely.set_precision(shapely.union_all(array), grid)
+        return shapely.union_all(array)
+    except (shapely.errors.GEOSException, ValueError):
+        popupcad.algorithms.csg_shapely.log_fallback()
+        result = array[0]
+        for item in array[1:]:
+            result = shapely.union(result, item)
+        return result
+
+
+def ring_coordinates(rings, scaling=1):
+    '''coordinates of every ring, read in one call and split into one array per ring'''
+    coords, index = shapely.get_coordinates(rings, return_index=True)
+    counts = numpy.bincount(index, minlength=len(rings))
+    return numpy.split(coords * scaling, numpy.cumsum(counts)[:-1])
+
+
+def to_generic(array, scaling=1):
+    '''array shapes for every polygon and line in array, in order, built from one coordinate buffer'''
+    from popupcad.filetypes.arrayshapes import ArrayPoly, ArrayPolyline
+    from popupcad.geometry.vertex import DrawnPoint
+
+    array = as_array(array)
+    type_ids = shapely.get_type_id(array)
+    if numpy.isin(type_ids, handled_type_ids, invert=True).any():
+        raise popupcad.algorithms.csg_shapely.GeometryNotHandled()
+    polygons = numpy.nonzero(type_ids == 3)[0]
+    lines = numpy.nonzero((type_ids == 1) | (type_ids == 2))[0]
+
+    num_interiors = shapely.get_num_interior_rings(array[polygons])
+    owners = numpy.repeat(numpy.arange(len(polygons)), num_interiors)
+    ring_numbers = numpy.arange(len(owners)) - numpy.repeat(numpy.cumsum(num_interiors) - num_interiors, num_interiors)
+    rings = numpy.concatenate([shapely.get_exterior_ring(array[polygons]),
+                               shapely.get_interior_ring(array[polygons][owners], ring_numbers),
+                               array[lines]])
+    pieces = ring_coordinates(rings, scaling)
+
+    exteriors = pieces[:len(polygons)]
+    interiors = numpy.split(numpy.arange(len(polygons), len(polygons) + len(owners)), numpy.cumsum(num_interiors)[:-1])
+    line_pieces = pieces[len(polygons) + len(owners):]
+
+    output = [None] * len(array)
+    for ii, exterior, interior in zip(polygons, exteriors, interiors):
+        output[ii] = ArrayPoly(exterior, [pieces[jj] for jj in interior])
+    for ii, points in zip(lines, line_pieces):
+        output[ii] = ArrayPolyline(points, [])
+    for ii in numpy.nonzero(type_ids == 0)[0]:
+        output[ii] = DrawnPoint(tuple((shapely.get_coordinates(array[ii])[0] * scaling).tolist()))
+    return output
+
+
+def affine_transform(array, matrix):
+    '''apply a shapely-style [a, b, d, e, xoff, yoff] transform to every geometry at once'''
+    a, b, d, e, xoff, yoff = matrix
+
+    def transform_coords(coords):
+        # written out as shapely.affinity does it, so both backends round identically
+        x, y = coords.T
+        return numpy.stack([a * x + b * y + xoff, d * x + e * y + yoff]).T
+    return shapely.transform(array, transform_coords)
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+Written by Daniel M. Aukes and CONTRIBUTORS
+Email: danaukes<at>asu.edu.
+Please see LICENSE for full license.
+"""
+
+import hashlib
+
+
+def digest(*items):
+    '''combine strings, bytes, and other digests into a single hex digest'''
+    h = hashlib.sha1()
+    for item in items:
+        if not isinstance(item, bytes):
+            item = str(item).encode('utf-8')
+        h.update(item)
+        h.update(b'\x00')
+    return h.hexdigest()
+
+
+def object_fingerprint(obj):
+    '''digest of the yaml representation of an object, as it would be saved to disk'''
+    import yaml
+    return digest(yaml.dump(obj))
+
+
+def geometry_fingerprint(geoms):
+    '''digest of a list of shapely geometries'''
+    return digest(*[geom.wkb for geom in geoms])
@@ -32,8 +32,8 @@ def getjoints(geoms,roundvalue):
     m = m.round(roundvalue)
     m2 = [tuple(items) for items in m.tolist()]
     m3 = list(set(m2))
-#    jj = numpy.searchsorted(m3,m2)
-    index_to_unique = [m3.index(item) for item in m2]
+    lookup = dict([(item, ii) for ii, item in enumerate(m3)])
+    index_to_unique = [lookup[item] for item in m2]
     indeces_to_orig = [[] for item in m3]
     [indeces_to_orig[item].append(ii) for ii, item in enumerate(index_to_unique)]
 
@@ -46,11 +46,8 @@ def getjoints(geoms,roundvalue):
             ordered_vertices = popupcad.algorithms.points.order_vertices(vertices,a[0],tolerance=tolerance)
             segs = list(zip(ordered_vertices[:-1], ordered_vertices[1:]))
             midpoints = popupcad.algorithms.points.segment_midpoints(segs)
-            count = [0 for item in midpoints]
-            for ii in segments:
-                for jj, point in enumerate(midpoints):
-                    if popupcad.algorithms.points.point_within_line(point,lines[ii],tolerance=tolerance):
-                        count[jj] += 1
+            within = popupcad.algorithms.points.points_within_lines(midpoints, [lines[ii] for ii in segments], tolerance)
+            count = within.sum(1).tolist()
             newsegments.extend([seg for count_ii, seg in zip(count, segs) if count_ii > 1])
 
     generic_lines = [GenericLine([ShapeVertex(v1), ShapeVertex(v2)], []) for v1, v2 in newsegments]
@@ -4,30 +4,115 @@ Written by Daniel M. Aukes and CONTRIBUTORS
 Email: danaukes<at>asu.edu.
 Please see LICENSE for full license.
 """
+import popupcad
 from popupcad.filetypes.layer import Layer
-from popupcad.filetypes.laminate import Laminate
+from popupcad.filetypes.laminate import Laminate, map_layers
+from popupcad.filetypes.output_cache import OutputCache
+
+
+def prefix_union(laminatein):
+    '''running union of the layers of laminatein, from the first layer up'''
+    l = Layer([])
+    laminateout = Laminate(laminatein.layerdef)
+    for ii, geoms in enumerate(laminatein):
+        l = l.union(geoms)
+        laminateout[ii] = l
+    return laminateout
+
+
+class KeepoutService(OutputCache):
+
+    '''
+    Keepouts and clearances of laminates.  Every variant is derived from one
+    running union up from the bottom layer and one down from the top, and all
+    of them are kept by laminate fingerprint.  Callers get copies, down to the
+    layers, so they may change them freely.
+    '''
+
+    @property
+    def size(self):
+        if self._size is None:
+            return popupcad.keepout_cache_size
+        return self._size
+
+    def variant(self, laminatein, name):
+        key = laminatein.fingerprint(), popupcad.csg_precision_mode
+        try:
+            variants = self[key]
+        except KeyError:
+            variants = self[key] = {}
+        try:
+            laminateout = variants[name]
+        except KeyError:
+            laminateout = variants[name] = getattr(self, '_' + name)(laminatein, variants)
+        return laminateout.copy(deep=True)
+
+    def _unions(self, laminatein, variants):
+        '''the running unions up and down, computed side by side'''
+        up, down = map_layers(prefix_union, [laminatein, laminatein.flip()])
+        variants['up'] = up
+        variants['down'] = down.flip()
+        return up
+
+    def up(self, laminatein):
+        return self.variant(laminatein, 'up')
+
+    def _up(self, laminatein, variants):
+        return self._unions(laminatein, variants)
+
+    def down(self, laminatein):
+        return self.variant(laminatein, 'down')
+
+    def _down(self, laminatein, variants):
+        self._unions(laminatein, variants)
+        return variants['down']
+
+    def laser(self, laminatein):
+        return self.variant(laminatein, 'laser')
+
+    def _laser(self, laminatein, variants):
+        up = self.up(laminatein)
+        top = up.layer_sequence[up.layerdef.layers[-1]]
+        laminateout = Laminate(laminatein.layerdef)
+        for layer in laminateout.layerdef.layers:
+            laminateout.replacelayergeoms(layer, top.geoms)
+        return laminateout
+
+    def mill(self, laminatein):
+        return self.down(laminatein)
+
+    def millflip(self, laminatein):
+        return self.variant(laminatein, 'millflip')
+
+    def _millflip(self, laminatein, variants):
+        return self.down(laminatein).intersection(self.up(laminatein))
+
+    def millclearance(self, laminatein):
+        return self.variant(laminatein, 'millclearance')
+
+    def _millclearance(self, laminatein, variants):
+        return self.laser(laminatein).difference(self.mill(laminatein))
+
+    def millflipclearance(self, laminatein):
+        return self.variant(laminatein, 'millflipclearance')
+
+    def _millflipclearance(self, laminatein, variants):
+        return self.laser(laminatein).difference(self.millflip(laminatein))
+
+
+keepouts = KeepoutService()
 
 
 def laserkeepout(laminatein):
     '''calculate the keepout for an input laminate assuming laser cutting'''
-    layers = laminatein.layerdef.layers
-    laminateout = laminatein.unarylayeroperation('union', layers, layers)
-    return laminateout
+    return keepouts.laser(laminatein)
 
 
 def millkeepout(laminatein):
     '''calculate the keepout for an input laminate assuming milling'''
-    l = Layer([])
-    laminateout = Laminate(laminatein.layerdef)
-    for ii, geoms in enumerate(laminatein[::-1]):
-        l = l.union(geoms)
-        laminateout[-1 - ii] = l
-    return laminateout
+    return keepouts.mill(laminatein)
 
 
 def millflipkeepout(laminatein):
     '''calculate the keepout for an input laminate assuming milling & part flipping'''
-    l1 = millkeepout(laminatein)
-    l2 = millkeepout(laminatein.flip()).flip()
-    lout = l1.intersection(l2)
-    return lout
+    return keepouts.millflip(laminatein)
@@ -72,27 +72,25 @@ def cross_section(layerdef, sketch, parent, scale_value):
     return laminate
 
 def transform_csg(layerdef_from,layerdef_to,inshift,outshift,step,geom_from,geoms_to,csg_laminate,scale_x,scale_y):
-    from popupcad.filetypes.laminate import Laminate
-    import shapely.affinity as aff
+    from popupcad.filetypes.laminate import Laminate, layer_class
     from popupcad.algorithms.points import calctransformfrom2lines
 
     lsout = Laminate(layerdef_to)
 
     for layer_from,layer_to in zip(layerdef_from.layers[::step][inshift:], layerdef_to.layers[outshift:]):
-        newgeoms = []
+        layer = csg_laminate.layer_sequence[layer_from]
+        if layer.isEmpty():
+            continue
+        transformed = []
         for geom in geoms_to:
-            for designgeom in csg_laminate.layer_sequence[layer_from].geoms:
-                try:
-                    from_line = geom_from.exteriorpoints(scaling = popupcad.csg_processing_scaling)
-                    to_line = geom.exteriorpoints(scaling = popupcad.csg_processing_scaling)
-                    transform = calctransformfrom2lines(from_line,to_line,scale_x=scale_x,scale_y=scale_y)
-                    transformed_geom = aff.affine_transform(designgeom,transform)
-                    newgeoms.append(transformed_geom)
-                except IndexError:
-                    pass
-        result1 = popupcad.algorithms.csg_shapely.unary_union_safe(newgeoms)
-        results2 = popupcad.algorithms.csg_shapely.condition_shapely_entities(result1)
-        lsout.replacelayergeoms(layer_to, results2)
+            try:
+                from_line = geom_from.exteriorpoints(scaling = popupcad.csg_processing_scaling)
+                to_line = geom.exteriorpoints(scaling = popupcad.csg_processing_scaling)
+                transform = calctransformfrom2lines(from_line,to_line,scale_x=scale_x,scale_y=scale_y)
+            except IndexError:
+                continue
+            transformed.append(layer.affine_transform(transform))
+        lsout.layer_sequence[layer_to] = layer_class().unary_union(transformed)
 
     return lsout
 
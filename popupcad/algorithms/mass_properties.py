@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Written by Daniel M. Aukes and CONTRIBUTORS
+Email: danaukes<at>asu.edu.
+Please see LICENSE for full license.
+"""
+
+import numpy
+import popupcad
+
+
+class Rings(object):
+
+    '''
+    Every ring of a set of polygons in one coordinate array, with the ring each
+    point belongs to, the point after it, and the weight of each ring: the sign
+    which makes exteriors add area and holes remove it.
+    '''
+
+    def __init__(self, rings, weights, owners):
+        lengths = numpy.array([len(ring) for ring in rings], dtype=int)
+        self.points = numpy.concatenate(rings) if rings else numpy.zeros((0, 2))
+        self.ring = numpy.repeat(numpy.arange(len(rings)), lengths)
+        starts = numpy.repeat(numpy.cumsum(lengths) - lengths, lengths)
+        index = numpy.arange(len(self.points))
+        self.next = starts + (index - starts + 1) % numpy.repeat(lengths, lengths)
+        self.owners = numpy.array(owners, dtype=int)
+        self.num_rings = len(rings)
+        signed_area = self.ring_sums(self.moments(numpy.zeros(2))[:1])[0]
+        self.weights = numpy.array(weights, dtype=float) * numpy.sign(signed_area)
+
+    def moments(self, about_point):
+        '''per point green's theorem terms of area, first and second moments about about_point'''
+        x0, y0 = (self.points - about_point).T
+        x1, y1 = x0[self.next], y0[self.next]
+        c = x0 * y1 - x1 * y0
+        return numpy.array([c / 2,
+                            (x0 + x1) * c / 6,
+                            (y0 + y1) * c / 6,
+                            (x0 * x0 + x0 * x1 + x1 * x1) * c / 12,
+                            (y0 * y0 + y0 * y1 + y1 * y1) * c / 12,
+                            (x0 * y1 + 2 * x0 * y0 + 2 * x1 * y1 + x1 * y0) * c / 24])
+
+    def ring_sums(self, terms):
+        return numpy.array([numpy.bincount(self.ring, item, minlength=self.num_rings) for item in terms])
+
+    def owner_sums(self, about_point, num_owners):
+        '''area, sx, sy, sxx, syy and sxy of each owner about about_point'''
+        sums = self.ring_sums(self.moments(about_point)) * self.weights
+        return numpy.array([numpy.bincount(self.owners, item, minlength=num_owners) for item in sums])
+
+
+def laminate_mass_properties(generic_laminate):
+    '''
+    volume, mass, center of mass and inertia tensor about the center of mass
+    of a generic laminate made of polygons.  other shapes raise
+    GeometryNotHandled, and a laminate without mass raises ValueError.
+    '''
+    from popupcad.filetypes.genericshapes import GenericPoly
+    zvalues = generic_laminate.layerdef.z_values2()
+    layers = generic_laminate.layers()
+    rings = []
+    weights = []
+    owners = []
+    for ii, layer in enumerate(layers):
+        for geom in generic_laminate.geoms[layer]:
+            if not isinstance(geom, GenericPoly):
+                raise popupcad.algorithms.csg_shapely.GeometryNotHandled('mass properties are only defined for polygons, not {0}'.format(type(geom).__name__))
+            loops = [geom.exteriorpoints()] + geom.interiorpoints()
+            rings.extend([numpy.array(loop, dtype=float).reshape(-1, 2) / popupcad.SI_length_scaling for loop in loops])
+            weights.extend([1] + [-1] * (len(loops) - 1))
+            owners.extend([ii] * len(loops))
+    rings = Rings(rings, weights, owners)
+
+    density = numpy.array([layer.density for layer in layers], dtype=float)
+    z_lower = numpy.array([zvalues[layer]['lower'] for layer in layers], dtype=float) / popupcad.SI_length_scaling
+    z_upper = numpy.array([zvalues[layer]['upper'] for layer in layers], dtype=float) / popupcad.SI_length_scaling
+    thickness = z_upper - z_lower
+
+    area, sx, sy = rings.owner_sums(numpy.zeros(2), len(layers))[:3]
+    volume = area * thickness
+    mass = volume * density
+    volume_total = volume.sum()
+    mass_total = mass.sum()
+    if not mass_total > 0:
+        raise ValueError('laminate has no mass, so no center of mass')
+    center_of_mass = numpy.array([(density * thickness * sx).sum(),
+                                  (density * thickness * sy).sum(),
+                                  (mass * (z_lower + z_upper) / 2).sum()]) / mass_total
+
+    # second moments about the center of mass, integrating z in closed form across each layer
+    area, sx, sy, sxx, syy, sxy = rings.owner_sums(center_of_mass[:2], len(layers))
+    zl = z_lower - center_of_mass[2]
+    zu = z_upper - center_of_mass[2]
+    sz = (zu**2 - zl**2) / 2
+    szz = (zu**3 - zl**3) / 3
+    Ixx = (density * (thickness * syy + area * szz)).sum()
+    Iyy = (density * (thickness * sxx + area * szz)).sum()
+    Izz = (density * thickness * (sxx + syy)).sum()
+    Ixy = -(density * thickness * sxy).sum()
+    Iyz = -(density * sy * sz).sum()
+    Izx = -(density * sx * sz).sum()
+    I = numpy.array([[Ixx, Ixy, Izx], [Ixy, Iyy, Iyz], [Izx, Iyz, Izz]])
+    return volume_total, mass_total, center_of_mass, I
@@ -20,8 +20,52 @@ def identical(pt1,pt2):
     return all(numpy.array(pt1) == numpy.array(pt2))
 
 def pointinpoints(pt1, pts, tolerance):
-    tests = [twopointsthesame(pt1, pt2, tolerance) for pt2 in pts]
-    return True in tests
+    if len(pts) == 0:
+        return False
+    return bool(points_same(pt1, pts, tolerance).any())
+
+
+def points_same(pts1, pts2, tolerance):
+    '''twopointsthesame for each row of two (n, 2) arrays, which broadcast against each other'''
+    v = numpy.asarray(pts2, dtype=float) - numpy.asarray(pts1, dtype=float)
+    return (v * v).sum(-1)**.5 < tolerance
+
+
+def points_near(points, query, tolerance):
+    '''for each query point, the sorted indices of the points closer than tolerance, found with a kd-tree'''
+    from scipy.spatial import cKDTree
+    points = numpy.asarray(points, dtype=float).reshape(-1, 2)
+    query = numpy.asarray(query, dtype=float).reshape(-1, 2)
+    if len(points) == 0:
+        return [numpy.zeros(0, dtype=int) for item in query]
+    # the tree searches a slightly larger radius; the final test is the one twopointsthesame makes
+    candidates = cKDTree(points).query_ball_point(query, tolerance * (1 + 1e-9))
+    near = []
+    for point, indices in zip(query, candidates):
+        indices = numpy.array(sorted(indices), dtype=int)
+        near.append(indices[points_same(point, points[indices], tolerance)])
+    return near
+
+
+def points_in_points(query, points, tolerance):
+    '''pointinpoints for every query point, as a boolean mask'''
+    return numpy.array([len(item) > 0 for item in points_near(points, query, tolerance)], dtype=bool)
+
+
+def nonredundant_indices(points, tolerance, loop_test=True):
+    '''indices of the points which are at least tolerance from the last point kept and, in a loop, the last point from the first'''
+    points = numpy.asarray(points, dtype=float).reshape(-1, 2)
+    close = numpy.nonzero(points_same(points[1:], points[:-1], tolerance))[0]
+    # everything up to the first close pair is kept; after that, points are compared with the last one kept
+    keep = list(range(close[0] + 1)) if len(close) else list(range(len(points)))
+    for ii in range(len(keep), len(points)):
+        if not points_same(points[ii], points[keep[-1]], tolerance):
+            keep.append(ii)
+    last = len(points) - 1
+    if loop_test and len(keep) > 1 and keep[-1] == last:
+        if points_same(points[last], points[0], tolerance):
+            keep.pop(-1)
+    return keep
 
 def point_on_line(point, line, tolerance):
     point = numpy.array(point)
@@ -37,6 +81,20 @@ def point_on_line(point, line, tolerance):
     return abs(vpoint) < abs(tolerance)
 
 
+def points_on_lines(points, lines, tolerance):
+    '''point_on_line for every point against every line.  element [ii, jj] tests points[ii] against lines[jj]'''
+    points = numpy.array(points, dtype=float).reshape(-1, 1, 2)
+    lines = numpy.array(lines, dtype=float).reshape(1, -1, 2, 2)
+    p1 = lines[:, :, 0, :]
+    v = lines[:, :, 1, :] - p1
+    lv = (v * v).sum(2)
+    v2 = points - p1
+    lv2 = (v2 * v2).sum(2)
+    vpoint = (v * v2).sum(2)**2 - lv * lv2
+    vpoint = abs(vpoint)**(.5)
+    return abs(vpoint) < abs(tolerance)
+
+
 def colinear(line1, line2, tolerance):
     a = point_on_line(line2[0], line1, tolerance)
     b = point_on_line(line2[1], line1, tolerance)
@@ -58,6 +116,22 @@ def point_within_line(point, line, tolerance):
     return same_direction and same_orientation and within
 
 
+def points_within_lines(points, lines, tolerance):
+    '''point_within_line for every point against every line.  element [ii, jj] tests points[ii] against lines[jj]'''
+    points = numpy.array(points, dtype=float).reshape(-1, 1, 2)
+    lines = numpy.array(lines, dtype=float).reshape(1, -1, 2, 2)
+    p1 = lines[:, :, 0, :]
+    v = lines[:, :, 1, :] - p1
+    v2 = points - p1
+    lv = (v * v).sum(2)**.5
+    lv2 = (v2 * v2).sum(2)**.5
+    v_dot_v2 = (v * v2).sum(2)
+    same_orientation = v_dot_v2 > 0
+    within = lv2 < lv
+    same_direction = abs(abs(v_dot_v2) - (lv * lv2)) < tolerance
+    return same_direction & same_orientation & within
+
+
 def order_vertices(vertices, segment_seed, tolerance):
     vertices = list(set(vertices))
     ordering = list(segment_seed)
@@ -70,10 +144,9 @@ def order_vertices(vertices, segment_seed, tolerance):
         elif point_within_line(b, [a, c], tolerance):
             ordering.append(c)
         else:
-            for ii, b in enumerate(ordering[1:]):
-                if point_within_line(c, [a, b], tolerance):
-                    ordering.insert(ii + 1, c)
-                    break
+            within = points_within_lines([c], [[a, b] for b in ordering[1:]], tolerance)[0]
+            if within.any():
+                ordering.insert(int(within.argmax()) + 1, c)
     return ordering
 
 
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Written by Daniel M. Aukes and CONTRIBUTORS
+Email: danaukes<at>asu.edu.
+Please see LICENSE for full license.
+"""
+
+import os
+import time
+import json
+import tracemalloc
+
+active_profile = None
+
+
+def count(name):
+    '''add one to a counter of the profile being recorded, if any'''
+    if active_profile is not None:
+        active_profile.count(name)
+
+
+def vertex_count(geom):
+    '''number of coordinates in a shapely geometry'''
+    if hasattr(geom, 'geoms'):
+        return sum([vertex_count(item) for item in geom.geoms])
+    if hasattr(geom, 'exterior'):
+        if geom.is_empty:
+            return 0
+        return len(geom.exterior.coords) + sum([len(item.coords) for item in geom.interiors])
+    return len(geom.coords)
+
+
+def output_sizes(operation):
+    '''number of geometries and vertices in every output of an operation'''
+    geometries = 0
+    vertices = 0
+    for output in operation.output:
+        for layer in output.csg:
+            geometries += len(layer.geoms)
+            vertices += sum([vertex_count(geom) for geom in layer.geoms])
+    return geometries, vertices
+
+
+class RegenProfile(object):
+
+    '''
+    Records the cost of generating each operation during a regen: wall time,
+    peak python memory, output size, and how often the underlying layer and
+    union functions were called.
+    '''
+    counter_names = ['layer_binaryoperation', 'layer_valueoperation', 'unary_union', 'unary_union_fallback']
+    fields = ['name', 'type', 'id', 'start', 'duration', 'memory_peak', 'generated', 'geometries', 'vertices'] + counter_names
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.records = []
+        self.counters = dict([(name, 0) for name in self.counter_names])
+        self.start = None
+
+    def count(self, name):
+        self.counters[name] = self.counters.get(name, 0) + 1
+
+    def generate(self, operation):
+        '''generate operation as Operation2.generate_outer1 does, recording its cost'''
+        global active_profile
+
+        if self.start is None:
+            self.start = time.time()
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        elif hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        memory_start = tracemalloc.get_traced_memory()[0]
+        counters_start = self.counters.copy()
+
+        previous, active_profile = active_profile, self
+        t0 = time.time()
+        try:
+            generated = operation.generate_outer1()
+        finally:
+            t1 = time.time()
+            active_profile = previous
+            memory_peak = tracemalloc.get_traced_memory()[1] - memory_start
+            if started_tracing:
+                tracemalloc.stop()
+
+        record = {}
+        record['name'] = str(operation)
+        record['type'] = type(operation).__name__
+        record['id'] = operation.id
+        record['start'] = t0 - self.start
+        record['duration'] = t1 - t0
+        record['memory_peak'] = memory_peak
+        record['generated'] = generated
+        record['geometries'], record['vertices'] = output_sizes(operation)
+        for name in self.counter_names:
+            record[name] = self.counters.get(name, 0) - counters_start.get(name, 0)
+        self.records.append(record)
+        return record
+
+    def total_duration(self):
+        return sum([record['duration'] for record in self.records])
+
+    def slowest(self, n=10):
+        return sorted(self.records, key=lambda record: record['duration'], reverse=True)[:n]
+
+    def summary(self):
+        lines = ['{0:>9} {1:>10} {2:>8} {3:>9}  {4}'.format('time (s)', 'memory', 'geoms', 'vertices', 'operation')]
+        for record in self.slowest(len(self.records)):
+            lines.append('{duration:9.4f} {memory_peak:10d} {geometries:8d} {vertices:9d}  {name}'.format(**record))
+        lines.append('{0:9.4f} total'.format(self.total_duration()))
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.summary()
+
+    def to_dict(self):
+        return {'records': self.records, 'counters': self.counters, 'total_duration': self.total_duration()}
+
+    def save_json(self, filename):
+        with open(filename, 'w') as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+    def save_csv(self, filename):
+        import csv
+        with open(filename, 'w', newline='') as f:
+            writer = csv.DictWriter(f, self.fields)
+            writer.writeheader()
+            for record in self.records:
+                writer.writerow(record)
+
+    def chrome_trace(self):
+        '''events in the chrome trace format, viewable in chrome://tracing or perfetto'''
+        events = []
+        for record in self.records:
+            event = {}
+            event['name'] = record['name']
+            event['cat'] = record['type']
+            event['ph'] = 'X'
+            event['ts'] = record['start'] * 1e6
+            event['dur'] = record['duration'] * 1e6
+            event['pid'] = os.getpid()
+            event['tid'] = 0
+            event['args'] = dict([(key, record[key]) for key in self.fields if key not in ('name', 'type', 'start', 'duration')])
+            events.append(event)
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save_chrome_trace(self, filename):
+        with open(filename, 'w') as f:
+            json.dump(self.chrome_trace(), f)
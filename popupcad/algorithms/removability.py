@@ -4,17 +4,11 @@ Written by Daniel M. Aukes and CONTRIBUTORS
 Email: danaukes<at>asu.edu.
 Please see LICENSE for full license.
 """
-from popupcad.filetypes.layer import Layer
-from popupcad.filetypes.laminate import Laminate
+from popupcad.filetypes.laminate import map_layers
+from popupcad.algorithms.keepout import prefix_union
 
 def one_way_up(laminatein):
-    l = Layer([])
-    laminateout = Laminate(laminatein.layerdef)
-    for ii, geoms in enumerate(laminatein):
-        l = l.union(geoms)
-        laminateout[ii] = l
-    laminateout = modify_up(laminateout)
-    return laminateout
+    return modify_up(prefix_union(laminatein))
 
 
 def one_way_down(laminatein):
@@ -37,45 +31,95 @@ def modify_up(removabilityin):
 
 
 def generate_removable_scrap(device, sheet, tol=1e-5, device_buffer=0):
-    #    scrap = sheet.difference(device)
-    #    smaller_scrap = scrap.buffer(-tol)
-    removability_up = one_way_up(device)
-    removability_down = one_way_down(device)
-    removability_both = two_way(device)
-    not_removable_region = (
-        removability_up.cleanup(tol)).intersection(
-        removability_down.cleanup(tol))
-    not_removable_scrap_region = not_removable_region.difference(
-        device.cleanup(tol))
-    not_removable_scrap_region = not_removable_region.cleanup(tol)
-
-    if device_buffer > 0:
-        buffered_device = device.buffer(device_buffer)
-    else:
-        buffered_device = device
-    all_scrap = sheet.difference(buffered_device)
-    removable_scrap = all_scrap.difference(
-        not_removable_scrap_region.buffer(tol))
-    two_way_scrap = removable_scrap.difference(removability_both.buffer(tol))
-    directionally_removable_scrap = removable_scrap.difference(
-        two_way_scrap.buffer(tol))
-    up_scrap = directionally_removable_scrap.intersection(
-        removability_up.buffer(-tol))
-    down_scrap = directionally_removable_scrap.intersection(
-        removability_down.buffer(-tol))
-    return two_way_scrap, up_scrap.buffer(-tol), down_scrap.buffer(-tol)
+    return RemovabilityEngine(device, tol).removable_scrap(sheet, device_buffer)
 
 
 def more_removable_mod(bleed, device, sheet, tol=1e-5):
-    two_way_scrap, up_scrap, down_scrap = generate_removable_scrap(
-        device, sheet, tol)
-    up_bleed = two_way((up_scrap.buffer(bleed)).intersection(two_way_scrap))
-    down_bleed = two_way(
-        (down_scrap.buffer(bleed)).intersection(two_way_scrap))
-    up_bleed = up_bleed.difference(down_bleed.buffer(tol))
-    down_bleed = down_bleed.difference(up_bleed.buffer(tol))
-    two_way_scrap_mod = two_way_scrap.difference(
-        up_bleed).difference(down_bleed)
-    up_scrap_mod = up_scrap.union(up_bleed.buffer(tol))
-    down_scrap_mod = down_scrap.union(down_bleed.buffer(tol))
-    return two_way_scrap_mod, up_scrap_mod, down_scrap_mod
+    return RemovabilityEngine(device, tol).more_removable(bleed, sheet)
+
+
+class RemovabilityEngine(object):
+
+    '''
+    Removability of one device.  The up and down sweeps are computed once, side
+    by side, and every intermediate laminate is kept, so scrap, bleed and
+    support for the same device share their work.
+    '''
+
+    def __init__(self, device, tol=1e-5, parallel=None):
+        self.device = device
+        self.tol = tol
+        self.parallel = parallel
+        self.intermediates = {}
+
+    def intermediate(self, key, function, *args):
+        '''the result stored under key, computed as function(*args) on first use'''
+        try:
+            return self.intermediates[key]
+        except KeyError:
+            self.intermediates[key] = function(*args)
+            return self.intermediates[key]
+
+    def prefix_unions(self):
+        '''running unions of the device from the bottom, and from the top of the flipped device'''
+        return self.intermediate('prefix_unions', lambda: map_layers(prefix_union, [self.device, self.device.flip()], parallel=self.parallel))
+
+    def one_way_up(self):
+        return self.intermediate('one_way_up', lambda: modify_up(self.prefix_unions()[0].copy()))
+
+    def one_way_down(self):
+        return self.intermediate('one_way_down', lambda: modify_up(self.prefix_unions()[1].copy()).flip())
+
+    def two_way(self):
+        return self.intermediate('two_way', two_way, self.device)
+
+    def buffered(self, name, value):
+        return self.intermediate((name, 'buffer', value), lambda: getattr(self, name)().buffer(value))
+
+    def cleaned(self, name):
+        return self.intermediate((name, 'cleanup'), lambda: getattr(self, name)().cleanup(self.tol))
+
+    def not_removable_region(self):
+        return self.intermediate('not_removable_region', lambda: self.cleaned('one_way_up').intersection(self.cleaned('one_way_down')))
+
+    def not_removable_scrap_region(self):
+        return self.cleaned('not_removable_region')
+
+    def buffered_device(self, device_buffer):
+        if device_buffer > 0:
+            return self.intermediate(('device', 'buffer', device_buffer), self.device.buffer, device_buffer)
+        return self.device
+
+    def removable_scrap(self, sheet, device_buffer=0):
+        '''two way, up and down scrap of sheet'''
+        key = ('removable_scrap', sheet.fingerprint(), device_buffer)
+        return self.intermediate(key, self._removable_scrap, sheet, device_buffer)
+
+    def _removable_scrap(self, sheet, device_buffer):
+        tol = self.tol
+        all_scrap = sheet.difference(self.buffered_device(device_buffer))
+        removable_scrap = all_scrap.difference(self.buffered('not_removable_scrap_region', tol))
+        two_way_scrap = removable_scrap.difference(self.buffered('two_way', tol))
+        directionally_removable_scrap = removable_scrap.difference(two_way_scrap.buffer(tol))
+        up_scrap = directionally_removable_scrap.intersection(self.buffered('one_way_up', -tol))
+        down_scrap = directionally_removable_scrap.intersection(self.buffered('one_way_down', -tol))
+        return two_way_scrap, up_scrap.buffer(-tol), down_scrap.buffer(-tol)
+
+    def more_removable(self, bleed, sheet):
+        '''removable scrap of sheet, with scrap within bleed of the one way scrap moved to that side'''
+        key = ('more_removable', sheet.fingerprint(), bleed)
+        return self.intermediate(key, self._more_removable, bleed, sheet)
+
+    def _more_removable(self, bleed, sheet):
+        tol = self.tol
+        two_way_scrap, up_scrap, down_scrap = self.removable_scrap(sheet)
+        up_bleed = two_way((up_scrap.buffer(bleed)).intersection(two_way_scrap))
+        down_bleed = two_way(
+            (down_scrap.buffer(bleed)).intersection(two_way_scrap))
+        up_bleed = up_bleed.difference(down_bleed.buffer(tol))
+        down_bleed = down_bleed.difference(up_bleed.buffer(tol))
+        two_way_scrap_mod = two_way_scrap.difference(
+            up_bleed).difference(down_bleed)
+        up_scrap_mod = up_scrap.union(up_bleed.buffer(tol))
+        down_scrap_mod = down_scrap.union(down_bleed.buffer(tol))
+        return two_way_scrap_mod, up_scrap_mod, down_scrap_mod
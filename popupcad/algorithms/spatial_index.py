@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Written by Daniel M. Aukes and CONTRIBUTORS
+Email: danaukes<at>asu.edu.
+Please see LICENSE for full license.
+"""
+
+import warnings
+import shapely
+from shapely.strtree import STRtree
+
+# shapely 2 queries return indices and can apply a predicate; 1.8 returns items through query_items
+shapely2 = int(shapely.__version__.split('.')[0]) >= 2
+
+
+class SpatialIndex(object):
+
+    '''STRtree over a list of geometries, answering queries with indices into that list'''
+
+    def __init__(self, geoms):
+        self.geoms = list(geoms)
+        with warnings.catch_warnings():
+            # 1.8 warns that the STRtree api changes in 2.0; both are handled here
+            warnings.simplefilter('ignore')
+            self.tree = STRtree(self.geoms)
+
+    def candidates(self, geom):
+        '''indices of the geometries whose bounding boxes overlap that of geom'''
+        if shapely2:
+            return sorted(self.tree.query(geom).tolist())
+        return sorted(self.tree.query_items(geom))
+
+    def intersecting(self, geom):
+        '''indices of the geometries which intersect geom'''
+        return [ii for ii in self.candidates(geom) if self.geoms[ii].intersects(geom)]
+
+    def pairs_intersecting(self, geoms):
+        '''(ii, jj) for every geoms[ii] which intersects the indexed geometry jj'''
+        if shapely2:
+            from popupcad.algorithms.csg_vectorized import as_array
+            if len(geoms) == 0:
+                return []
+            left, right = self.tree.query(as_array(geoms), predicate='intersects')
+            return sorted(zip(left.tolist(), right.tolist()))
+        return [(ii, jj) for ii, geom in enumerate(geoms) for jj in self.intersecting(geom)]
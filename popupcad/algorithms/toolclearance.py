@@ -4,24 +4,16 @@ Written by Daniel M. Aukes and CONTRIBUTORS
 Email: danaukes<at>asu.edu.
 Please see LICENSE for full license.
 """
-from popupcad.filetypes.layer import Layer
-from popupcad.filetypes.laminate import Laminate
-from popupcad.algorithms.keepout import laserkeepout, millkeepout, millflipkeepout
+from popupcad.algorithms.keepout import keepouts
 
 
 def laserclearance(laminatein):
-    return laserkeepout(laminatein)
+    return keepouts.laser(laminatein)
 
 
 def millclearance(laminatein):
-    l1 = laserkeepout(laminatein)
-    l2 = millkeepout(laminatein)
-    l3 = l1.difference(l2)
-    return l3
+    return keepouts.millclearance(laminatein)
 
 
 def millflipclearance(laminatein):
-    l1 = laserkeepout(laminatein)
-    l2 = millflipkeepout(laminatein)
-    l3 = l1.difference(l2)
-    return l3
+    return keepouts.millflipclearance(laminatein)
@@ -35,16 +35,14 @@ def find_outer(ls, minpoint):
     lsouter = Laminate(ls.layerdef)
     lsinner = Laminate(ls.layerdef)
     for layer, layer_geometry in ls.layer_sequence.items():
-        outergeoms = []
-        innergeoms = []
-        for geom in layer_geometry.geoms:
-            if points.pointinpoints(
-                    minpoint,
-                    popupcad.algorithms.csg_shapely.to_generic(geom).exteriorpoints(scaling = popupcad.csg_processing_scaling),
-                    popupcad.distinguishable_number_difference):
-                outergeoms.append(geom)
-            else:
-                innergeoms.append(geom)
+        generics = popupcad.algorithms.csg_shapely.to_generic_list(layer_geometry.geoms)
+        exteriors = [numpy.array(item.exteriorpoints(scaling = popupcad.csg_processing_scaling)).reshape(-1, 2) for item in generics]
+        owners = numpy.repeat(numpy.arange(len(exteriors)), [len(item) for item in exteriors])
+        allpoints = numpy.concatenate(exteriors) if exteriors else numpy.zeros((0, 2))
+        near = points.points_near(allpoints, [minpoint], popupcad.distinguishable_number_difference)[0]
+        outer = set(owners[near].tolist())
+        outergeoms = [geom for ii, geom in enumerate(layer_geometry.geoms) if ii in outer]
+        innergeoms = [geom for ii, geom in enumerate(layer_geometry.geoms) if ii not in outer]
         lsouter.replacelayergeoms(layer, outergeoms)
         lsinner.replacelayergeoms(layer, innergeoms)
     return lsouter, lsinner
@@ -5,6 +5,8 @@ Email: danaukes<at>asu.edu.
 Please see LICENSE for full license.
 """
 
+from . import array_layer
+from . import arrayshapes
 from . import classtools
 from . import design
 from . import popupcad_file
@@ -19,7 +21,9 @@ from . import material2
 #from . import operation
 from . import operation2
 from . import operationoutput
+from . import output_cache
 from . import program
+from . import regen_scheduler
 #from . import programsettings
 from . import sketch
 from . import solidworksimport
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Written by Daniel M. Aukes and CONTRIBUTORS
+Email: danaukes<at>asu.edu.
+Please see LICENSE for full license.
+"""
+import numpy
+import shapely.geometry as sg
+from popupcad.filetypes.layer import Layer
+from popupcad.algorithms import csg_vectorized
+
+
+class ArrayLayer(Layer):
+
+    '''
+    Layer which keeps its geometry in a numpy array and works on it with
+    shapely 2's vectorized functions.  Used in place of Layer when
+    popupcad.csg_backend is 'vectorized'.
+    '''
+    available = csg_vectorized.available
+
+    def __init__(self, geoms):
+        self.array = csg_vectorized.as_array(geoms)
+
+    @property
+    def geoms(self):
+        return list(self.array)
+
+    def add_geoms(self, geoms):
+        self.array = numpy.concatenate([self.array, csg_vectorized.as_array(geoms)])
+        self.clear_fingerprint()
+        self.clear_merged()
+        self.clear_spatial_index()
+
+    def isEmpty(self):
+        return len(self.array) == 0
+
+    def merged(self):
+        try:
+            return self._merged
+        except AttributeError:
+            if len(self.array) == 0:
+                self._merged = sg.Polygon()
+            else:
+                self._merged = csg_vectorized.unary_union_safe(self.array)
+            return self._merged
+
+    @classmethod
+    def from_result(cls, geoms):
+        result1 = csg_vectorized.unary_union_safe(csg_vectorized.as_array(geoms))
+        result2 = csg_vectorized.condition_shapely_entities(result1)
+        return cls(result2)
+
+    @classmethod
+    def unary_union(cls, layers):
+        arrays = [csg_vectorized.as_array(getattr(layer, 'array', layer.geoms)) for layer in layers]
+        if not arrays:
+            return cls.from_result([])
+        return cls.from_result(numpy.concatenate(arrays))
+
+    def affine_transform(self, matrix):
+        return type(self)(csg_vectorized.affine_transform(self.array, matrix))
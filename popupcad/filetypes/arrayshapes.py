@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+Written by Daniel M. Aukes and CONTRIBUTORS
+Email: danaukes<at>asu.edu.
+Please see LICENSE for full license.
+"""
+
+import threading
+import numpy
+import yaml
+import shapely.geometry as sg
+import popupcad
+
+from popupcad.geometry.vertex import BaseVertex, ShapeVertex
+from popupcad.filetypes.genericshapes import GenericPoly, GenericPolyline
+
+_id_lock = threading.Lock()
+# ids handed to array vertices start well above any id() of a python object, so they never collide with ShapeVertex ids
+_next_id = [2**62]
+
+
+def restore_object(cls, state):
+    new = cls.__new__(cls)
+    new.__dict__.update(state)
+    return new
+
+
+def allocate_ids(n):
+    with _id_lock:
+        start = _next_id[0]
+        _next_id[0] += n
+    return numpy.arange(start, start + n, dtype=numpy.int64)
+
+
+def ring_arrays(ring):
+    '''coordinates and vertex ids of a ring given either as vertices or as points'''
+    if len(ring) > 0 and isinstance(ring[0], BaseVertex):
+        points = numpy.array([vertex.getpos() for vertex in ring], dtype=float)
+        ids = numpy.array([vertex.id for vertex in ring], dtype=numpy.int64)
+    else:
+        points = numpy.array(ring, dtype=float)
+        ids = allocate_ids(len(points))
+    return points.reshape(-1, 2), ids
+
+
+def remove_redundant_points(points, ids, loop_test=True):
+    '''array version of GenericShapeBase.remove_redundant_points'''
+    keep = popupcad.algorithms.points.nonredundant_indices(points, popupcad.distinguishable_number_difference, loop_test)
+    return points[keep], ids[keep]
+
+
+class VertexView(ShapeVertex):
+
+    '''a vertex of an array shape, reading and writing its position in the shape's arrays'''
+
+    def __init__(self, shape, ring, index):
+        self.shape = shape
+        self.ring = ring
+        self.index = index
+
+    def get_id(self):
+        return int(self.shape._ids[self.ring][self.index])
+
+    def set_id(self, value):
+        self.shape._ids[self.ring][self.index] = value
+
+    id = property(get_id, set_id)
+
+    def getpos(self, scaling=1):
+        return tuple((self.shape._rings[self.ring][self.index] * scaling).tolist())
+
+    def setpos(self, pos, scaling=1):
+        self.shape._rings[self.ring][self.index] = numpy.array(pos, dtype=float) * scaling
+
+    position = property(getpos, setpos)
+
+    def __hash__(self):
+        return self.id
+
+    def __eq__(self, other):
+        if isinstance(other, ShapeVertex):
+            return self.id == other.id
+        return False
+
+    def copy(self, identical=True):
+        new = ShapeVertex(self.getpos())
+        if identical:
+            new.id = self.id
+        return new
+
+    def round(self, identical=False, decimal_places=None):
+        return self.copy(identical=True).round(identical, decimal_places)
+
+    def __reduce_ex__(self, protocol):
+        new = self.copy()
+        return restore_object, (type(new), new.__dict__)
+
+
+class ArrayShapeBase(object):
+
+    '''
+    Generic shape whose rings are contiguous numpy arrays, with the vertex ids
+    held in parallel arrays.  Vertices are only created, as views onto the
+    arrays, when asked for; points, transforms and shapely conversion work on
+    the arrays directly.  Saved and pickled as the equivalent vertex-based shape.
+    '''
+    plain_type = None
+    loop_test = True
+
+    def __init__(self, exterior, interiors, construction=False, test_shapely=False):
+        self.id = id(self)
+        self.construction = construction
+        self._rings = []
+        self._ids = []
+        for ring in [exterior] + list(interiors):
+            points, ids = ring_arrays(ring)
+            points, ids = remove_redundant_points(points, ids, self.loop_test)
+            self._rings.append(points)
+            self._ids.append(ids)
+
+    @classmethod
+    def gen_from_arrays(cls, exterior, interiors, **kwargs):
+        return cls(exterior, interiors, **kwargs)
+
+    gen_from_point_lists = gen_from_arrays
+
+    def _replace_rings(self, rings, ids):
+        new = type(self).__new__(type(self))
+        new.id = self.id
+        new.construction = self.is_construction()
+        new._rings = rings
+        new._ids = ids
+        return new
+
+    def get_exterior(self):
+        return [VertexView(self, 0, ii) for ii in range(len(self._rings[0]))]
+
+    def get_interiors(self):
+        return [[VertexView(self, jj, ii) for ii in range(len(ring))] for jj, ring in enumerate(self._rings[1:], 1)]
+
+    def set_exterior(self, vertices):
+        self._rings[0], self._ids[0] = ring_arrays(vertices)
+
+    def set_interiors(self, interiors):
+        interiors = [ring_arrays(interior) for interior in interiors]
+        self._rings[1:] = [points for points, ids in interiors]
+        self._ids[1:] = [ids for points, ids in interiors]
+
+    exterior = property(get_exterior, set_exterior)
+    interiors = property(get_interiors, set_interiors)
+
+    def len_exterior(self):
+        return len(self._rings[0])
+
+    def exterior_array(self, scaling=1):
+        return self._rings[0] * scaling
+
+    def interior_arrays(self, scaling=1):
+        return [ring * scaling for ring in self._rings[1:]]
+
+    def exteriorpoints(self, scaling=1):
+        return list(map(tuple, (self._rings[0] * scaling).tolist()))
+
+    def interiorpoints(self, scaling=1):
+        return [list(map(tuple, (ring * scaling).tolist())) for ring in self._rings[1:]]
+
+    def exteriorpoints_3d(self, z=0):
+        return numpy.c_[self._rings[0], numpy.full(len(self._rings[0]), z, dtype=float)].tolist()
+
+    def interiorpoints_3d(self, z=0):
+        return [numpy.c_[ring, numpy.full(len(ring), z, dtype=float)].tolist() for ring in self._rings[1:]]
+
+    def points(self, scaling=1):
+        return list(map(tuple, (numpy.concatenate(self._rings) * scaling).tolist()))
+
+    def copy(self, identical=True):
+        if identical:
+            ids = [item.copy() for item in self._ids]
+        else:
+            ids = [allocate_ids(len(item)) for item in self._ids]
+        new = self._replace_rings([ring.copy() for ring in self._rings], ids)
+        if not identical:
+            new.id = id(new)
+        return new
+
+    def upgrade(self, identical=True):
+        return self.copy(identical)
+
+    def to_vertex_shape(self):
+        '''the equivalent shape built from ShapeVertex objects'''
+        exterior = [vertex.copy() for vertex in self.get_exterior()]
+        interiors = [[vertex.copy() for vertex in interior] for interior in self.get_interiors()]
+        new = self.plain_type(exterior, interiors, self.is_construction())
+        new.id = self.id
+        return new
+
+    def __reduce_ex__(self, protocol):
+        new = self.to_vertex_shape()
+        return restore_object, (type(new), new.__dict__)
+
+    @staticmethod
+    def shape_representer(dumper, shape):
+        return dumper.represent_object(shape.to_vertex_shape())
+
+    def insert_exterior_vertex(self, ii, vertex):
+        self._rings[0] = numpy.insert(self._rings[0], ii, vertex.getpos(), axis=0)
+        self._ids[0] = numpy.insert(self._ids[0], ii, vertex.id)
+
+    def append_exterior_vertex(self, vertex):
+        self.insert_exterior_vertex(len(self._rings[0]), vertex)
+
+    def removevertex(self, vertex):
+        for jj, ids in enumerate(self._ids):
+            keep = ids != vertex.id
+            self._rings[jj] = self._rings[jj][keep]
+            self._ids[jj] = ids[keep]
+        self.update_handles()
+
+    def scale(self, m):
+        self._rings = [ring * m for ring in self._rings]
+
+    def shift(self, dxdy):
+        dxdy = numpy.array(dxdy, dtype=float)
+        self._rings = [ring + dxdy for ring in self._rings]
+
+    def transform(self, T):
+        T = numpy.array(T)
+        rings = [ring.dot(T[:2, :2].T) + T[:2, 2] for ring in self._rings]
+        return self._replace_rings(rings, [allocate_ids(len(ring)) for ring in rings])
+
+    def flip(self):
+        self._rings = [ring[::-1] for ring in self._rings]
+        self._ids = [ids[::-1] for ids in self._ids]
+
+
+class ArrayPoly(ArrayShapeBase, GenericPoly):
+    plain_type = GenericPoly
+
+    def to_shapely(self, scaling=1):
+        return sg.Polygon(self._rings[0] * scaling, [ring * scaling for ring in self._rings[1:]])
+
+
+class ArrayPolyline(ArrayShapeBase, GenericPolyline):
+    plain_type = GenericPolyline
+    loop_test = False
+
+    def to_shapely(self, scaling=1):
+        if len(self._rings[0]) < 2:
+            return sg.LineString()
+        return sg.LineString(self._rings[0] * scaling)
+
+yaml.add_representer(VertexView, ShapeVertex.vertex_representer)
+yaml.add_representer(ArrayPoly, ArrayPoly.shape_representer)
+yaml.add_representer(ArrayPolyline, ArrayPolyline.shape_representer)
@@ -6,7 +6,11 @@ Please see LICENSE for full license.
 """
 import popupcad
 from popupcad.filetypes.popupcad_file import popupCADFile
+from popupcad.filetypes.output_cache import OutputCache, SubdesignCache, DiskOutputCache
+from popupcad.filetypes.regen_scheduler import RegenScheduler
+from popupcad.algorithms.fingerprint import object_fingerprint
 from dev_tools.acyclicdirectedgraph import AcyclicDirectedGraph
+from dev_tools.genericfile import NoFileName
 import yaml
 import os
 
@@ -17,6 +21,9 @@ class NoOperation(Exception):
     def __init__(self):
         Exception.__init__(self, 'No Parent Operation')
 
+class RegenCancelled(Exception):
+    pass
+
 class RegenFailure(Exception):
     def __init__(self,other_exceptions):
         Exception.__init__(self, 'Regen Failure',[str(item) for item in other_exceptions])
@@ -61,10 +68,29 @@ class Design(popupCADFile):
             del self.__layerdef
             return self._layerdef
 
+    def index_operations(self, start=0):
+        '''rebuild the id->index lookup from start onward'''
+        try:
+            indeces = self._operation_indeces
+        except AttributeError:
+            indeces = self._operation_indeces = {}
+            start = 0
+        if start == 0:
+            indeces.clear()
+        for ii, op in enumerate(self.operations[start:], start):
+            indeces[op.id] = ii
+        return indeces
+
     def operation_index(self, operation_ref):
+        # the lookup is checked against the list, since operations may be reordered or replaced without going through the design
+        try:
+            ii = self._operation_indeces[operation_ref]
+            if self.operations[ii].id == operation_ref:
+                return ii
+        except (AttributeError, KeyError, IndexError):
+            pass
         try:
-            indeces = dict([(op.id, ii) for ii, op in enumerate(self.operations)])
-            return indeces[operation_ref]
+            return self.index_operations()[operation_ref]
         except KeyError:
             raise(NoOperation)
 
@@ -125,8 +151,8 @@ class Design(popupCADFile):
             error_string = str(newop) + ' is a child of ' + str(oldop)
             raise UpgradeError
 
-        ii = self.operations.index(newop)
-        jjs = [self.operations.index(item) for item in oldop.decendents()]
+        ii = self.operation_index(newop.id)
+        jjs = [self.operation_index(item.id) for item in oldop.decendents()]
         if not not jjs:
             jj = min(jjs)
             if ii > jj:
@@ -134,8 +160,7 @@ class Design(popupCADFile):
                     newop) + ' is below a child of ' + str(oldop) + '. Please move up.'
                 raise UpgradeError
 
-        for op in self.operations:
-            failed_ops = self.replace_op_refs_force(oldref, newref)
+        failed_ops = self.replace_op_refs_force(oldref, newref)
         if not not failed_ops:
             error_string = 'Some operations cannot be updated'
             message_string = 'Please update manually.'
@@ -216,6 +241,7 @@ class Design(popupCADFile):
         while not not self.operations:
             self.operations.pop()
         self.operations.extend(newoperations)
+        self.index_operations()
 
     def addoperation(self, operation):
         if not not self.operations:
@@ -260,13 +286,94 @@ class Design(popupCADFile):
     def subdesigns_are_reprocessed(self,value):
         self._subdesigns_are_reprocessed = value
 
-    def reprocessoperations(self, operations=None,debugprint = False):
+    @property
+    def output_cache(self):
+        try:
+            return self._output_cache
+        except AttributeError:
+            self._output_cache = OutputCache()
+            return self._output_cache
+
+    @property
+    def subdesign_cache(self):
+        try:
+            return self._subdesign_cache
+        except AttributeError:
+            self._subdesign_cache = SubdesignCache()
+            return self._subdesign_cache
+
+    @property
+    def disk_cache(self):
+        '''the output cache stored beside this design's file, if enabled and the file exists'''
+        if not popupcad.disk_output_cache:
+            return None
+        try:
+            filename = self.filename()
+        except NoFileName:
+            return None
+        if not os.path.isfile(filename):
+            return None
+        return DiskOutputCache(filename + '.cache')
+
+    def load_output(self, fingerprint, operation):
+        try:
+            return self.output_cache[fingerprint]
+        except KeyError:
+            disk_cache = self.disk_cache
+            if disk_cache is None or operation.cached_attributes:
+                raise
+            entry = disk_cache.load(fingerprint, operation, self.return_layer_definition())
+            self.output_cache[fingerprint] = entry
+            return entry
+
+    def store_output(self, fingerprint, operation, entry):
+        self.output_cache[fingerprint] = entry
+        disk_cache = self.disk_cache
+        if disk_cache is not None:
+            disk_cache.store(fingerprint, entry, operation)
+
+    def defer_operations(self, operations):
+        for op in operations:
+            op.defer_output()
+
+    def pull(self, operation):
+        '''generate operation and whichever of its ancestors are still deferred'''
+        self.build_tree()
+        for op in operation.ancestors() + [operation]:
+            if op.output_is_deferred():
+                op.generate_outer1()
+
+    def clear_fingerprints(self):
+        self._fingerprints = {}
+
+    def _memoized_fingerprint(self, key, function):
+        try:
+            fingerprints = self._fingerprints
+        except AttributeError:
+            fingerprints = self._fingerprints = {}
+        try:
+            return fingerprints[key]
+        except KeyError:
+            fingerprints[key] = function()
+            return fingerprints[key]
+
+    def layerdef_fingerprint(self):
+        return self._memoized_fingerprint('layerdef',lambda:object_fingerprint(self.return_layer_definition().copy()))
+
+    def sketch_fingerprint(self, ref):
+        return self._memoized_fingerprint(('sketch',ref),lambda:object_fingerprint(self.sketches[ref].copy()))
+
+    def subdesign_fingerprint(self, ref):
+        return self._memoized_fingerprint(('subdesign',ref),lambda:object_fingerprint(self.subdesigns[ref].copy()))
+
+    def reprocessoperations(self, operations=None,debugprint = False,workers = None,lazy = None,progress = None,profile = None):
         self.build_tree()
         self.update_operation_design()
+        self.clear_fingerprints()
             
         if not self.subdesigns_are_reprocessed:
             for subdesign in self.subdesigns.values():
-                subdesign.reprocessoperations()
+                subdesign.reprocessoperations(lazy=lazy, progress=progress)
             self.subdesigns_are_reprocessed=True
 
         if operations is None:
@@ -278,23 +385,96 @@ class Design(popupCADFile):
 
         if debugprint:
             print(operations)
-            
+
+        if workers is None:
+            workers = popupcad.regen_workers
+        if lazy is None:
+            lazy = popupcad.lazy_regen
+
+        if lazy:
+            self.defer_operations(operations)
+            return
+
+        if profile is not None:
+            # operations are profiled one at a time, so their timings are not mixed up with one another
+            for ii, op in enumerate(operations):
+                profile.generate(op)
+                if progress is not None:
+                    progress(ii + 1, len(operations), op)
+            if debugprint:
+                print(profile)
+        elif workers > 1 and len(operations) > 1:
+            RegenScheduler(self, workers, progress).run(operations)
+        else:
+            for ii, op in enumerate(operations):
+                op.generate_outer1()
+                if progress is not None:
+                    progress(ii + 1, len(operations), op)
+
+    def regen_snapshot(self):
+        '''
+        copy of this design which can be regenerated on another thread.  the
+        operations are copied along with their current outputs, and subdesigns
+        which still need regenerating are snapshotted in turn.  the layer
+        definition and caches are shared.
+        '''
+        operations = []
+        for op in self.operations:
+            new = op.copy_wrapper()
+            if not op.output_is_deferred():
+                try:
+                    new.adopt_output(op, reparent=False)
+                except AttributeError:
+                    pass
+            operations.append(new)
+        sketches = dict([(key, value.copy(identical=True)) for key, value in self.sketches.items()])
+        if self.subdesigns_are_reprocessed:
+            # regenerated subdesigns are only read
+            subdesigns = self.subdesigns
+        else:
+            subdesigns = dict([(key, value.regen_snapshot()) for key, value in self.subdesigns.items()])
+        new = type(self)(operations, self.return_layer_definition(), sketches, subdesigns)
+        new._output_cache = self.output_cache
+        new._subdesign_cache = self.subdesign_cache
+        new.subdesigns_are_reprocessed = self.subdesigns_are_reprocessed
+        self.copy_file_params(new, True)
+        return new
+
+    def adopt_outputs(self, snapshot, operations):
+        '''swap in the outputs of operations generated in a snapshot, skipping any which have since been removed'''
         for op in operations:
-            op.generate_outer1()
+            try:
+                self.op_from_ref(op.id).adopt_output(op)
+            except (NoOperation, AttributeError):
+                pass
+        if snapshot.subdesigns_are_reprocessed and not self.subdesigns_are_reprocessed:
+            for key, value in snapshot.subdesigns.items():
+                if key in self.subdesigns:
+                    self.subdesigns[key] = value
+            self.subdesigns_are_reprocessed = True
 
     def append_operation(self,item):
         item.set_design(self)
-        return self.operations.append(item)
+        self.operations.append(item)
+        self.index_operations(len(self.operations)-1)
 
     def insert_operation(self,index,item):
         item.set_design(self)
-        return self.operations.insert(index,item)
+        self.operations.insert(index,item)
+        # reindex from where list.insert placed the item, rather than searching the list for it
+        start = index if index >= 0 else len(self.operations) - 1 + index
+        self.index_operations(min(max(start, 0), len(self.operations) - 1))
+        self.operation_index(item.id)
 
     def remove_operation(self,item):
-        return self.operations.remove(item)
+        ii = self.operations.index(item)
+        self.pop_operation(ii)
 
     def pop_operation(self,ii):
-        return self.operations.pop(ii)
+        ii = range(len(self.operations))[ii]
+        item = self.operations.pop(ii)
+        self.index_operations(ii).pop(item.id, None)
+        return item
                 
     def build_tree(self):
         connections = []
@@ -302,8 +482,11 @@ class Design(popupCADFile):
             for parentref in child.parentrefs():
                 parent = self.op_from_ref(parentref)
                 connections.append((parent, child))
-        tree = AcyclicDirectedGraph(self.operations[:], connections)
-        return tree
+        try:
+            tree = self._tree
+        except AttributeError:
+            tree = self._tree = AcyclicDirectedGraph()
+        return tree.sync(self.operations[:], connections)
 
     def cleanup_subdesigns(self):
         subdesignrefs = []
@@ -211,28 +211,7 @@ class GenericLaminate(object):
         return bounds
 
     def mass_properties(self):
-        zvalues = self.layerdef.z_values2()
-        volume_total = 0
-        center_of_mass_accumulator = 0
-        next_args = []
-        mass_total = 0
-        for layer in self.layers():
-            layer_volume = 0
-            density = layer.density
-            z_lower = zvalues[layer]['lower']
-            z_upper = zvalues[layer]['upper']
-            for geom in self.geoms[layer]:
-                area,centroid,volume,mass,tris = geom.mass_properties(density,z_lower,z_upper)
-                volume_total+=volume
-                layer_volume+=volume
-                center_of_mass_accumulator+=volume*centroid*density
-                next_args.append((geom,(density,z_lower,z_upper,tris)))
-            mass_total+=layer_volume*density
-        center_of_mass = center_of_mass_accumulator/mass_total
-        I = 0
-        for geom,args in next_args:
-            I+=geom.inertia_tensor(center_of_mass,*args)
-        return volume_total,mass_total,center_of_mass,I
+        return popupcad.algorithms.mass_properties.laminate_mass_properties(self)
 
     def cross_sectional_area(self):
         import popupcad.algorithms.keepout as ka
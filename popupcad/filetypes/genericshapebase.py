@@ -415,16 +415,6 @@ class GenericShapeBase(object):
 
     @classmethod
     def remove_redundant_points(cls, points, scaling=1,loop_test = True):
-        newpoints = []
-        if len(points)>0:
-            points = points[:]
-            newpoints.append(points.pop(0))
-            while not not points:
-                newpoint = points.pop(0)
-                if not popupcad.algorithms.points.twopointsthesame(newpoints[-1].getpos(scaling),newpoint.getpos(scaling),popupcad.distinguishable_number_difference):
-                    if len(points)==0 and loop_test:
-                        if not popupcad.algorithms.points.twopointsthesame(newpoints[0].getpos(scaling),newpoint.getpos(scaling),popupcad.distinguishable_number_difference):
-                            newpoints.append(newpoint)
-                    else:
-                        newpoints.append(newpoint)
-        return newpoints
\ No newline at end of file
+        positions = [point.getpos(scaling) for point in points]
+        keep = popupcad.algorithms.points.nonredundant_indices(positions,popupcad.distinguishable_number_difference,loop_test)
+        return [points[ii] for ii in keep]
\ No newline at end of file
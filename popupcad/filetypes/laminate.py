@@ -5,8 +5,60 @@ Email: danaukes<at>asu.edu.
 Please see LICENSE for full license.
 """
 from popupcad.filetypes.layer import Layer
+import functools
 import popupcad
 
+_executors = {}
+
+
+def layer_class():
+    '''the layer implementation selected by popupcad.csg_backend'''
+    if popupcad.csg_backend == 'vectorized':
+        from popupcad.filetypes.array_layer import ArrayLayer
+        if ArrayLayer.available:
+            return ArrayLayer
+    return Layer
+
+
+def layer_executor(mode=None):
+    '''the shared pool for per-layer operations, or None to run them serially.  mode defaults to popupcad.layer_parallel'''
+    if mode is None:
+        mode = popupcad.layer_parallel
+    if not mode:
+        return None
+    if mode is True:
+        mode = 'thread'
+    try:
+        return _executors[mode]
+    except KeyError:
+        import concurrent.futures
+        if mode == 'process':
+            # for geos builds which hold the gil
+            import multiprocessing
+            context = multiprocessing.get_context(popupcad.regen_start_method)
+            executor = concurrent.futures.ProcessPoolExecutor(popupcad.layer_parallel_workers, mp_context=context)
+        elif mode == 'thread':
+            executor = concurrent.futures.ThreadPoolExecutor(popupcad.layer_parallel_workers)
+        else:
+            raise ValueError(mode)
+        _executors[mode] = executor
+        return executor
+
+
+def map_layers(function, *iterables, parallel=None):
+    executor = layer_executor(parallel)
+    if executor is None:
+        return list(map(function, *iterables))
+    return list(executor.map(function, *iterables))
+
+
+def _binaryoperation(layer1, layer2, functionname):
+    return layer1.binaryoperation(layer2, functionname)
+
+
+def _valueoperation(layer1, functionname, value, kwargs):
+    return layer1.valueoperation(functionname, value, **kwargs)
+
 
 class IterableLaminate(object):
 
@@ -21,12 +73,12 @@ class IterableLaminate(object):
         if isinstance(index, int):
             if isinstance(v, Layer):
                 v = v.geoms
-            self.layer_sequence[self.layerdef.layers[index]] = Layer(v)
+            self.replacelayergeoms(self.layerdef.layers[index], v)
         elif isinstance(index, slice):
             for value, layer in zip(v, self.layerdef.layers[index]):
                 if isinstance(value, Layer):
                     value = value.geoms
-                self.layer_sequence[layer] = Layer(value)
+                self.replacelayergeoms(layer, value)
 
     def __iter__(self):
         for layer in self.layerdef.layers:
@@ -50,9 +102,13 @@ class Laminate(IterableLaminate):
         for layer in self.layerdef.layers:
             self.replacelayergeoms(layer, [])
 
-    def copy(self):
+    def copy(self, deep=False):
+        '''new laminate on the same layers.  a deep copy also copies each layer, rather than sharing it'''
         new = type(self)(self.layerdef)
-        new.layer_sequence = self.layer_sequence.copy()
+        if deep:
+            new.layer_sequence = dict([(layer, value.copy()) for layer, value in self.layer_sequence.items()])
+        else:
+            new.layer_sequence = self.layer_sequence.copy()
         return new
 
     def upgrade(self, *args, **kwargs):
@@ -65,11 +121,27 @@ class Laminate(IterableLaminate):
         return all([layer.isEmpty() for layer in self.layer_sequence.values()])
 
     def replacelayergeoms(self, layer, geoms):
-        self.layer_sequence[layer] = Layer(geoms)
+        self.layer_sequence[layer] = layer_class()(geoms)
 
     def insertlayergeoms(self, layer, geoms):
         self.layer_sequence[layer].add_geoms(geoms)
 
+    def fingerprint(self):
+        items = [(layer.id, self.layer_sequence[layer].fingerprint()) for layer in self.layerdef.layers]
+        return popupcad.algorithms.fingerprint.digest(*items)
+
+    def intersecting(self, geom):
+        '''for each layer, the geometries which intersect geom'''
+        return dict([(layer, self.layer_sequence[layer].intersecting(geom)) for layer in self.layerdef.layers])
+
+    def pairs_intersecting(self, other):
+        '''for each layer, the index pairs of intersecting geometries in this laminate and other'''
+        return dict([(layer, self.layer_sequence[layer].pairs_intersecting(other.layer_sequence[layer])) for layer in self.layerdef.layers])
+
+    def intersects(self, other):
+        '''True if any layer of this laminate intersects the same layer of other'''
+        return any([self.layer_sequence[layer].intersects(other.layer_sequence[layer]) for layer in self.layerdef.layers])
+
     def getlayer(self, ref):
         return self.layerdef.getlayer(ref)
 
@@ -96,59 +168,80 @@ class Laminate(IterableLaminate):
     def simplify(self, tolerance, **kwargs):
         return self.valueoperation('simplify',tolerance,preserve_topology=True)
 
-    def binaryoperation(self, ls2, function):
-        self = self
+    def binaryoperation(self, ls2, function, parallel=None):
         lsout = Laminate(self.layerdef)
         layers = self.layerdef.layers
         if self.layerdef != ls2.layerdef:
             raise Exception
-        for layer in layers:
-            layer1 = self.layer_sequence[layer]
-            layer2 = ls2.layer_sequence[layer]
-            layerout = layer1.binaryoperation(layer2, function)
-            lsout.replacelayergeoms(layer, layerout.geoms)
+        layers1 = [self.layer_sequence[layer] for layer in layers]
+        layers2 = [ls2.layer_sequence[layer] for layer in layers]
+        results = map_layers(functools.partial(_binaryoperation, functionname=function), layers1, layers2, parallel=parallel)
+        lsout.layer_sequence.update(zip(layers, results))
         return lsout
 
     @staticmethod
-    def unaryoperation(laminates, function):
+    def unaryoperation(laminates, function, parallel=None):
+        '''fold a list of laminates together with function, giving the same geometry as applying it left to right'''
         laminates = laminates[:]
         lsout = laminates.pop(0)
-        while not not laminates:
-            lsout = lsout.binaryoperation(laminates.pop(0), function)
+        if not laminates:
+            return lsout
+        if function == 'union':
+            return Laminate.union_all([lsout] + laminates, parallel)
+        if function == 'difference':
+            return lsout.binaryoperation(Laminate.union_all(laminates, parallel), function, parallel)
+        laminates.insert(0, lsout)
+        while len(laminates) > 1:
+            pairs = zip(laminates[0::2], laminates[1::2])
+            reduced = [laminate1.binaryoperation(laminate2, function, parallel) for laminate1, laminate2 in pairs]
+            if len(laminates) % 2:
+                reduced.append(laminates[-1])
+            laminates = reduced
+        return laminates[0]
+
+    @staticmethod
+    def union_all(laminates, parallel=None):
+        '''
+        union any number of laminates with one cascaded union per layer.  the
+        result covers the same area as unioning them one at a time, but its
+        rings may start at different vertices
+        '''
+        layerdef = laminates[0].layerdef
+        if any([laminate.layerdef != layerdef for laminate in laminates]):
+            raise Exception
+        lsout = Laminate(layerdef)
+        inputs = [[laminate.layer_sequence[layer] for laminate in laminates] for layer in layerdef.layers]
+        results = map_layers(layer_class().unary_union, inputs, parallel=parallel)
+        lsout.layer_sequence.update(zip(layerdef.layers, results))
         return lsout
 
-    def valueoperation(self, functionname, value, **kwargs):
+    def valueoperation(self, functionname, value, parallel=None, **kwargs):
         lsout = Laminate(self.layerdef)
         layers = self.layerdef.layers
-        for layer in layers:
-            layer1 = self.layer_sequence[layer]
-            result = layer1.valueoperation(functionname, value, **kwargs)
-            lsout.replacelayergeoms(layer, result.geoms)
+        layers1 = [self.layer_sequence[layer] for layer in layers]
+        function = functools.partial(_valueoperation, functionname=functionname, value=value, kwargs=kwargs)
+        results = map_layers(function, layers1, parallel=parallel)
+        lsout.layer_sequence.update(zip(layers, results))
         return lsout
 
     def unarylayeroperation(self,functionname,selectedinputlayers,selectedoutputlayers):
         selectedinputlayers = selectedinputlayers[:]
         layer1 = self.layer_sequence[selectedinputlayers.pop(0)]
+        if functionname == 'union':
+            layer1 = layer_class().unary_union([layer1] + [self.layer_sequence[layer] for layer in selectedinputlayers])
+            selectedinputlayers = []
         for layer in selectedinputlayers:
             layer2 = self.layer_sequence[layer]
             layer1 = layer1.binaryoperation(layer2, functionname)
-        result = popupcad.algorithms.csg_shapely.unary_union_safe(layer1.geoms)
-        geoms1 = popupcad.algorithms.csg_shapely.condition_shapely_entities(result)
+        layer1 = layer_class().from_result([layer1.merged()])
         lsout = Laminate(self.layerdef)
         for layer in selectedoutputlayers:
-            lsout.replacelayergeoms(layer, geoms1)
+            lsout.replacelayergeoms(layer, layer1.geoms)
         return lsout
 
-    def binarylayeroperation2(self, function, layers1, layers2, outputlayers):
-        layer1 = self.layer_sequence[layers1.pop(0)]
-        for layer in layers1:
-            layer2 = self.layer_sequence[layer]
-            layer1 = layer1.union(layer2)
-        layer3 = self.layer_sequence[layers2.pop(0)]
-
-        for layer in layers2:
-            layer2 = self.layer_sequence[layer]
-            layer3 = layer3.union(layer2)
+    def binarylayeroperation2(self, function, layers1, layers2, outputlayers, parallel=None):
+        inputs = [[self.layer_sequence[layer] for layer in layers1], [self.layer_sequence[layer] for layer in layers2]]
+        layer1, layer3 = map_layers(layer_class().unary_union, inputs, parallel=parallel)
         layerout = layer1.binaryoperation(layer3, function)
 
         lsout = Laminate(self.layerdef)
@@ -163,11 +256,9 @@ class Laminate(IterableLaminate):
         from popupcad.filetypes.genericlaminate import GenericLaminate
         genericgeometry = {}
         for layer in self.layerdef.layers:
-            geometry = self.layer_sequence[layer].geoms
-            genericgeoms = []
-            for geom in geometry:
-                genericgeoms.append(popupcad.algorithms.csg_shapely.to_generic(geom))
-            genericgeometry[layer] = genericgeoms
+            item = self.layer_sequence[layer]
+            geometry = getattr(item, 'array', item.geoms)
+            genericgeometry[layer] = popupcad.algorithms.csg_shapely.to_generic_list(geometry)
         new = GenericLaminate(self.layerdef, genericgeometry)
         return new
 
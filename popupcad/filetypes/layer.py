@@ -6,6 +6,9 @@ Please see LICENSE for full license.
 """
 import shapely.geometry as sg
 import popupcad
+from popupcad.filetypes.output_cache import LayerMemo
+
+value_memo = LayerMemo()
 
 
 class Layer(object):
@@ -30,8 +33,101 @@ class Layer(object):
             kwargs['resolution'] = popupcad.default_buffer_resolution
         return self.valueoperation('buffer', value, **kwargs)
 
+    def copy(self):
+        '''new layer with its own geometry list, sharing the cached union and fingerprint'''
+        new = type(self)(self.geoms[:])
+        for key in ['_merged', '_fingerprint', '_spatial_index']:
+            try:
+                setattr(new, key, getattr(self, key))
+            except AttributeError:
+                pass
+        return new
+
     def add_geoms(self, geoms):
         self.geoms.extend(geoms)
+        self.clear_fingerprint()
+        self.clear_merged()
+        self.clear_spatial_index()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_spatial_index', None)
+        return state
+
+    def fingerprint(self):
+        try:
+            return self._fingerprint
+        except AttributeError:
+            self._fingerprint = popupcad.algorithms.fingerprint.geometry_fingerprint(self.geoms)
+            return self._fingerprint
+
+    def clear_fingerprint(self):
+        try:
+            del self._fingerprint
+        except AttributeError:
+            pass
+
+    def merged(self):
+        '''the union of geoms as a single shapely geometry, computed once'''
+        try:
+            return self._merged
+        except AttributeError:
+            if self.geoms == []:
+                self._merged = sg.Polygon()
+            else:
+                self._merged = popupcad.algorithms.csg_shapely.unary_union_safe(self.geoms)
+            return self._merged
+
+    def clear_merged(self):
+        try:
+            del self._merged
+        except AttributeError:
+            pass
+
+    def spatial_index(self):
+        '''STRtree over geoms, built on first use'''
+        try:
+            return self._spatial_index
+        except AttributeError:
+            self._spatial_index = popupcad.algorithms.spatial_index.SpatialIndex(self.geoms)
+            return self._spatial_index
+
+    def clear_spatial_index(self):
+        try:
+            del self._spatial_index
+        except AttributeError:
+            pass
+
+    def intersecting(self, geom):
+        '''the geometries of this layer which intersect geom'''
+        index = self.spatial_index()
+        return [index.geoms[ii] for ii in index.intersecting(geom)]
+
+    def pairs_intersecting(self, other):
+        '''(ii, jj) for every geometry ii of this layer which intersects geometry jj of other'''
+        return other.spatial_index().pairs_intersecting(self.spatial_index().geoms)
+
+    def intersects(self, other):
+        '''True if any geometry of this layer intersects any of other, stopping at the first hit'''
+        index = other.spatial_index()
+        return any(index.geoms[ii].intersects(geom) for geom in self.spatial_index().geoms for ii in index.candidates(geom))
+
+    @classmethod
+    def from_result(cls, geoms):
+        '''
+        build a layer from the raw result of a shapely operation.  the raw
+        union is not kept as the merged geometry: later operations depend on
+        its vertex order, and using it moved results slightly away from those
+        of a union of the conditioned list.  so a chained operation still
+        unions each operand's geoms once, the first time merged() is used.
+        '''
+        result1 = popupcad.algorithms.csg_shapely.unary_union_safe(geoms)
+        result2 = popupcad.algorithms.csg_shapely.condition_shapely_entities(result1)
+        return cls(result2)
+
+    def affine_transform(self, matrix):
+        import shapely.affinity as aff
+        return type(self)([aff.affine_transform(geom, matrix) for geom in self.geoms])
 
     def promote(self, layerdef):
         from popupcad.filetypes.laminate import Laminate
@@ -43,44 +139,36 @@ class Layer(object):
     @classmethod
     def unary_union(cls, layers):
         geoms = [geom for layer in layers for geom in layer.geoms]
-        result1 = popupcad.algorithms.csg_shapely.unary_union_safe(geoms)
-        result2 = popupcad.algorithms.csg_shapely.condition_shapely_entities(result1)
-        return cls(result2)
+        return cls.from_result(geoms)
 
     def binaryoperation(self, layer2, functionname):
-        sourcegeoms = self.geoms
-        operationgeoms = layer2.geoms
-
-        if sourcegeoms == []:
-            sourcegeom = sg.Polygon()
-        else:
-            sourcegeom = popupcad.algorithms.csg_shapely.unary_union_safe(sourcegeoms)
-
-        if operationgeoms == []:
-            operationgeom = sg.Polygon()
-        else:
-            operationgeom = popupcad.algorithms.csg_shapely.unary_union_safe(operationgeoms)
+        popupcad.algorithms.profiling.count('layer_binaryoperation')
+        sourcegeom = self.merged()
+        operationgeom = layer2.merged()
 
         function = getattr(sourcegeom, functionname)
         newgeom = function(operationgeom)
-
-        result1 = popupcad.algorithms.csg_shapely.unary_union_safe([newgeom])
-        result2 = popupcad.algorithms.csg_shapely.condition_shapely_entities(result1)
-        return type(self)(result2)
+        return type(self).from_result([newgeom])
 
     def valueoperation(self, functionname, *args, **kwargs):
-        sourcegeoms = self.geoms
-
-        if sourcegeoms == []:
-            sourcegeom = sg.Polygon()
-        else:
-            sourcegeom = popupcad.algorithms.csg_shapely.unary_union_safe(sourcegeoms)
+        popupcad.algorithms.profiling.count('layer_valueoperation')
+        key = (type(self), self.fingerprint(), functionname, args, tuple(sorted(kwargs.items())), popupcad.csg_precision_mode)
+        try:
+            return value_memo[key].copy()
+        except KeyError:
+            pass
+        except TypeError:
+            # unhashable arguments are not memoized
+            key = None
+
+        sourcegeom = self.merged()
 
         function = getattr(sourcegeom, functionname)
         newgeom = function(*args, **kwargs)
-        result1 = popupcad.algorithms.csg_shapely.unary_union_safe([newgeom])
-        result2 = popupcad.algorithms.csg_shapely.condition_shapely_entities(result1)
-        return type(self)(result2)
+        result = type(self).from_result([newgeom])
+        if key is not None:
+            value_memo[key] = result.copy()
+        return result
 
     def isEmpty(self):
         return len(self.geoms) == 0
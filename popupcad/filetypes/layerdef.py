@@ -16,6 +16,11 @@ class LayerDef(object):
         new = type(self)(*layers)
         return new
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_z_values', None)
+        return state
+
     def upgrade(self):
         layers = [layer.upgrade() for layer in self.layers]
         new = type(self)(*layers)
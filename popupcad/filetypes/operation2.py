@@ -5,13 +5,19 @@ Email: danaukes<at>asu.edu.
 Please see LICENSE for full license.
 """
 
+import popupcad
 from dev_tools.acyclicdirectedgraph import Node
 from popupcad.filetypes.userdata import UserData
-from popupcad.filetypes.operationoutput import OperationOutput
+from popupcad.filetypes.operationoutput import OperationOutput, DeferredOutput
+from popupcad.algorithms.fingerprint import digest, object_fingerprint
+from popupcad.algorithms.csg_shapely import operation_context
 
 
 class Operation2(Node, UserData):
     name = 'Operation'
+    cacheable = True
+    cached_attributes = []
+    parallel = True
 
     def __init__(self):
         Node.__init__(self)
@@ -95,9 +101,112 @@ class Operation2(Node, UserData):
             self._outputref = 0
             return self._outputref
 
+    def parameter_fingerprint(self):
+        return object_fingerprint(self.copy())
+
+    def fingerprint(self, design):
+        '''digest of everything the output of this operation depends on'''
+        items = [type(self).__name__, self.parameter_fingerprint(), design.layerdef_fingerprint()]
+        items.extend([design.sketch_fingerprint(ref) for ref in self.sketchrefs()])
+        items.extend([design.subdesign_fingerprint(ref) for ref in self.subdesignrefs()])
+        items.extend([design.op_from_ref(ref).output_fingerprint() for ref in self.parentrefs()])
+        if popupcad.csg_precision_mode:
+            items.append(('precision', popupcad.algorithms.csg_shapely.precision_grid()))
+        return digest(*items)
+
+    def output_fingerprint(self):
+        '''digest identifying the current output.  falls back to hashing the output geometry'''
+        try:
+            output, value = self._output_fingerprint
+            if output is self.output:
+                return value
+        except AttributeError:
+            pass
+        value = digest(*[item.csg.fingerprint() for item in self.output])
+        self._output_fingerprint = self.output, value
+        return value
+
+    def build_cache_entry(self):
+        attributes = dict([(key, getattr(self, key)) for key in self.cached_attributes])
+        return self.output[:], attributes
+
+    def restore_cache_entry(self, entry):
+        output, attributes = entry
+        for key, value in attributes.items():
+            setattr(self, key, value)
+        self.output = output[:]
+
+    def adopt_output(self, other, reparent=True):
+        '''take over the output and cached attributes of another copy of this operation'''
+        output, attributes = other.build_cache_entry()
+        if reparent:
+            for item in output:
+                if item.parent is not None and item.parent.id == self.id:
+                    item.parent = self
+        self.restore_cache_entry((output, attributes))
+        try:
+            output, value = other._output_fingerprint
+            if output is other.output:
+                self._output_fingerprint = self.output, value
+        except AttributeError:
+            pass
+
+    def cache_key(self, design):
+        if self.cacheable:
+            return self.fingerprint(design)
+        return None
+
+    def load_cached_output(self, design, value):
+        '''restore the output stored under value.  returns False if the operation must be generated'''
+        if value is None:
+            return False
+        try:
+            entry = design.load_output(value, self)
+        except KeyError:
+            return False
+        self.restore_cache_entry(entry)
+        self._output_fingerprint = self.output, value
+        return True
+
+    def store_cached_output(self, design, value):
+        if value is not None:
+            design.store_output(value, self, self.build_cache_entry())
+            self._output_fingerprint = self.output, value
+
     def generate_outer1(self):
+        '''generate, or restore from the cache.  returns True if the operation was generated'''
         design = self.design
-        self.generate(design)
+        value = self.cache_key(design)
+        if self.load_cached_output(design, value):
+            return False
+        self.generate_in_context(design)
+        self.store_cached_output(design, value)
+        return True
+
+    def generate_in_context(self, design):
+        '''generate, naming this operation in any csg fallback warnings'''
+        with operation_context(self):
+            self.generate(design)
+
+    def defer_output(self):
+        '''
+        replace the output with placeholders which generate it on first use,
+        keeping the names of the last outputs.  an operation which has never
+        been generated has no outputs to go by, so it is generated instead.
+        '''
+        try:
+            names = [item.name for item in self.output]
+        except AttributeError:
+            self.generate_outer1()
+            return
+        self.output = [DeferredOutput(name, self, ii) for ii, name in enumerate(names)]
+        self._deferred_output = self.output
+
+    def output_is_deferred(self):
+        try:
+            return self._deferred_output is self.output
+        except AttributeError:
+            return False
 
     def generate(self, design):
         result = self.operate(design)
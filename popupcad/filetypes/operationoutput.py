@@ -52,7 +52,6 @@ class OperationOutput(UserData):
         from popupcad.geometry.line import ReferenceLine
         from popupcad.geometry.vertex import ReferenceVertex
         vertices = []
-        unique_geoms = []
         all_geoms = []
         lines = []
         for layer, geoms in genericgeometry.geoms.items():
@@ -62,20 +61,14 @@ class OperationOutput(UserData):
                 vertices.extend(p)
                 lines.extend(geom.segmentpoints())
 
-        for geom in all_geoms:
-            is_unique = True
-            for geom2 in unique_geoms:
-                if geom.is_equal(geom2):
-                    is_unique = False
-                    break
-            if is_unique:
-                unique_geoms.append(geom)
+        unique_geoms = OperationOutput.unique_geoms(all_geoms)
 
         vertices = list(set(vertices))
         controlpoints = [ReferenceVertex(p) for p in vertices]
+        lookup = dict([(p, ii) for ii, p in enumerate(vertices)])
 
         lines = list(set(lines))
-        lines2 = [(vertices.index(p1), vertices.index(p2)) for p1, p2 in lines]
+        lines2 = [(lookup[p1], lookup[p2]) for p1, p2 in lines]
         controllines = [
             ReferenceLine(
                 controlpoints[ii],
@@ -83,6 +76,27 @@ class OperationOutput(UserData):
             jj in lines2]
         return controlpoints, controllines, unique_geoms
 
+    @staticmethod
+    def unique_geoms(geoms):
+        '''the first of each set of geoms which are is_equal to each other'''
+        import itertools
+        import math
+        import popupcad
+        tolerance = popupcad.distinguishable_number_difference
+        # equal shapes have the same ring lengths and first points in neighboring grid cells, so only those are compared
+        buckets = {}
+        unique_geoms = []
+        for geom in geoms:
+            exterior = geom.exteriorpoints()
+            structure = len(exterior), tuple([len(interior) for interior in geom.interiorpoints()])
+            cell = tuple([int(math.floor(item / tolerance)) for item in exterior[0]]) if exterior else ()
+            neighbors = itertools.product(*[(item - 1, item, item + 1) for item in cell])
+            candidates = (geom2 for neighbor in neighbors for geom2 in buckets.get((structure, neighbor), []))
+            if not any(geom.is_equal(geom2) for geom2 in candidates):
+                unique_geoms.append(geom)
+                buckets.setdefault((structure, cell), []).append(geom)
+        return unique_geoms
+
     def edit(self, *args, **kwargs):
         if self.parent is not None:
             self.parent.edit(*args, **kwargs)
@@ -122,3 +136,29 @@ class OperationOutput(UserData):
             None, 'description', 'label', text=self.description)
         if ok:
             self.description = result
+
+
+class DeferredOutput(OperationOutput):
+    '''
+    stands in for an output which has not been generated yet.  the first time
+    its csg is used, the parent operation is generated, along with any of its
+    ancestors which are still deferred.
+    '''
+
+    def __init__(self, name, parent, index):
+        super(DeferredOutput, self).__init__(None, name, parent)
+        self.index = index
+
+    def get_csg(self):
+        if self._csg is None:
+            self.parent.design.pull(self.parent)
+            output = self.parent.output
+            if self.index >= len(output):
+                raise IndexError('{0} has {1} outputs once regenerated, so output {2} no longer exists'.format(self.parent, len(output), self.index))
+            self._csg = output[self.index].csg
+        return self._csg
+
+    def set_csg(self, csg):
+        self._csg = csg
+
+    csg = property(get_csg, set_csg)
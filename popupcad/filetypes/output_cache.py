@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Written by Daniel M. Aukes and CONTRIBUTORS
+Email: danaukes<at>asu.edu.
+Please see LICENSE for full license.
+"""
+import base64
+import collections
+import glob
+import json
+import os
+import zlib
+import popupcad
+
+
+class OutputCache(object):
+    '''bounded, least-recently-used store of operation results, keyed by operation fingerprint'''
+
+    def __init__(self, size=None):
+        self._size = size
+        self.entries = collections.OrderedDict()
+
+    @property
+    def size(self):
+        if self._size is None:
+            return popupcad.output_cache_size
+        return self._size
+
+    # each step is a single OrderedDict call, so a cache shared with a regen thread stays consistent
+
+    def __getitem__(self, fingerprint):
+        entry = self.entries[fingerprint]
+        try:
+            self.entries.move_to_end(fingerprint)
+        except KeyError:
+            pass
+        return entry
+
+    def __setitem__(self, fingerprint, entry):
+        self.entries[fingerprint] = entry
+        try:
+            self.entries.move_to_end(fingerprint)
+        except KeyError:
+            pass
+        while len(self.entries) > self.size:
+            try:
+                self.entries.popitem(last=False)
+            except KeyError:
+                break
+
+    def __contains__(self, fingerprint):
+        return fingerprint in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+
+
+class LayerMemo(OutputCache):
+    '''bounded store of Layer.valueoperation results, keyed by layer class and fingerprint, function and arguments, which counts its hits and misses'''
+
+    def __init__(self, size=None):
+        super(LayerMemo, self).__init__(size)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def size(self):
+        if self._size is None:
+            return popupcad.layer_memo_size
+        return self._size
+
+    def __getitem__(self, key):
+        try:
+            entry = super(LayerMemo, self).__getitem__(key)
+        except KeyError:
+            self.misses += 1
+            raise
+        self.hits += 1
+        return entry
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self), 'size': self.size}
+
+    def clear(self):
+        super(LayerMemo, self).clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class SubdesignCache(OutputCache):
+    '''bounded store of regenerated subdesigns, kept apart from operation outputs since each is far larger'''
+
+    @property
+    def size(self):
+        if self._size is None:
+            return popupcad.subdesign_cache_size
+        return self._size
+
+
+class DiskOutputCache(object):
+    '''
+    output cache kept in a directory beside a design file.  each entry holds
+    the wkb of every layer of every output, and is keyed by the operation
+    fingerprint and popupcad.output_cache_format.
+    '''
+    extension = 'output'
+
+    def __init__(self, directory, size=None):
+        self.directory = directory
+        self._size = size
+
+    @property
+    def size(self):
+        if self._size is None:
+            return popupcad.disk_output_cache_size
+        return self._size
+
+    def path(self, fingerprint):
+        from popupcad.algorithms.fingerprint import digest
+        name = digest(fingerprint, popupcad.output_cache_format)
+        return os.path.join(self.directory, name + '.' + self.extension)
+
+    def load(self, fingerprint, operation, layerdef):
+        '''return the (output, attributes) entry stored for fingerprint.  raises KeyError if it is missing or unreadable'''
+        import shapely.wkb
+        from popupcad.filetypes.laminate import Laminate
+        from popupcad.filetypes.operationoutput import OperationOutput
+
+        path = self.path(fingerprint)
+        try:
+            with open(path, 'rb') as f:
+                data = json.loads(zlib.decompress(f.read()).decode('utf-8'))
+            output = []
+            for item in data['outputs']:
+                if len(item['layers']) != len(layerdef.layers):
+                    raise KeyError(fingerprint)
+                csg = Laminate(layerdef)
+                for layer, geoms in zip(layerdef.layers, item['layers']):
+                    csg.replacelayergeoms(layer, [shapely.wkb.loads(base64.b64decode(geom)) for geom in geoms])
+                parent = operation if item['owned'] else None
+                output.append(OperationOutput(csg, item['name'], parent))
+            os.utime(path, None)
+        except Exception:
+            # a missing, stale or damaged entry just means the operation is regenerated
+            raise KeyError(fingerprint)
+        return output, {}
+
+    def store(self, fingerprint, entry, operation):
+        '''write an entry to disk.  entries with extra attributes are not stored'''
+        output, attributes = entry
+        if attributes:
+            return
+        outputs = []
+        for item in output:
+            layers = [[base64.b64encode(geom.wkb).decode('ascii') for geom in layer.geoms] for layer in item.csg]
+            outputs.append({'name': item.name, 'owned': item.parent is operation, 'layers': layers})
+        data = zlib.compress(json.dumps({'outputs': outputs}).encode('utf-8'))
+
+        path = self.path(fingerprint)
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            temp = path + '.tmp'
+            with open(temp, 'wb') as f:
+                f.write(data)
+            os.replace(temp, path)
+            self.prune()
+        except (IOError, OSError):
+            pass
+
+    def prune(self):
+        '''remove the least recently used entries beyond size'''
+        paths = glob.glob(os.path.join(self.directory, '*.' + self.extension))
+        if len(paths) > self.size:
+            paths.sort(key=os.path.getmtime)
+            for path in paths[:len(paths) - self.size]:
+                os.remove(path)
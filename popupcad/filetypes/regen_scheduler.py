@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Written by Daniel M. Aukes and CONTRIBUTORS
+Email: danaukes<at>asu.edu.
+Please see LICENSE for full license.
+"""
+import hashlib
+import io
+import pickle
+import queue
+import multiprocessing
+
+import popupcad
+
+from popupcad.filetypes.operation2 import Operation2
+from popupcad.filetypes.operationoutput import OperationOutput
+
+
+class LayerPickler(pickle.Pickler):
+    '''pickles the layer definition and its layers by reference, so laminates can be rebound to the receiving side's layers'''
+
+    def __init__(self, file, layerdef):
+        super(LayerPickler, self).__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.references = dict([(id(item), ii) for ii, item in enumerate([layerdef] + layerdef.layers)])
+
+    def persistent_id(self, obj):
+        return self.references.get(id(obj))
+
+
+class LayerUnpickler(pickle.Unpickler):
+
+    def __init__(self, file, layerdef):
+        super(LayerUnpickler, self).__init__(file)
+        self.references = [layerdef] + layerdef.layers
+
+    def persistent_load(self, pid):
+        return self.references[pid]
+
+
+def dumps(obj, layerdef):
+    f = io.BytesIO()
+    LayerPickler(f, layerdef).dump(obj)
+    return f.getvalue()
+
+
+def loads(data, layerdef):
+    return LayerUnpickler(io.BytesIO(data), layerdef).load()
+
+
+class FinishedOperation(Operation2):
+    '''stands in for an already generated parent inside a worker process'''
+    name = 'Finished'
+
+    def __init__(self, id, output):
+        super(FinishedOperation, self).__init__()
+        self.editdata({}, {}, {})
+        self.id = id
+        self.output = [OperationOutput(csg, name, self) for csg, name in output]
+
+
+_pools = {}
+_worker_context = None
+
+
+def regen_pool(workers):
+    '''the shared pool of worker processes, started on first use and kept for later regens'''
+    key = popupcad.regen_start_method, workers
+    try:
+        return _pools[key]
+    except KeyError:
+        context = multiprocessing.get_context(popupcad.regen_start_method)
+        pool = context.Pool(workers)
+        _pools[key] = pool
+        return pool
+
+
+def _generate_in_worker(token, context, data):
+    from popupcad.filetypes.design import Design
+    global _worker_context
+
+    # the layer definition, sketches and subdesigns are unpickled once per regen, not once per operation
+    if _worker_context is None or _worker_context[0] != token:
+        _worker_context = token, pickle.loads(context)
+    layerdef, sketches, subdesigns = _worker_context[1]
+    operation, parent_outputs = loads(data, layerdef)
+    parents = [FinishedOperation(ref, output) for ref, output in parent_outputs.items()]
+    design = Design(parents + [operation], layerdef, sketches, subdesigns)
+    design.update_operation_design()
+
+    operation.generate_in_context(design)
+    output, attributes = operation.build_cache_entry()
+    owned = [item.parent is operation for item in output]
+    for item in output:
+        item.parent = None
+    return dumps((output, owned, attributes), layerdef)
+
+
+class RegenScheduler(object):
+    '''
+    Generates operations in dependency order, dispatching each operation to a
+    pool of worker processes as soon as all of its parents are finished.  The
+    pool is shared by every regen, so its processes are only started once.
+    '''
+
+    def __init__(self, design, workers, progress=None):
+        self.design = design
+        self.workers = workers
+        self.progress = progress
+        self.layerdef = design.return_layer_definition()
+
+    def run(self, operations):
+        design = self.design
+        scheduled = set(operations)
+        waiting = dict([(op, set(op.parents()) & scheduled) for op in operations])
+        children = dict([(op, [child for child in op.children() if child in scheduled]) for op in operations])
+
+        finished = queue.Queue()
+        try:
+            self.context = pickle.dumps((self.layerdef, design.sketches, design.subdesigns), pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            pool = None
+        else:
+            self.token = hashlib.sha1(self.context).hexdigest()
+            pool = regen_pool(self.workers)
+        ready = [op for op in operations if not waiting[op]]
+        running = 0
+        done = 0
+        while ready or running:
+            while ready:
+                op = ready.pop(0)
+                if self.dispatch(pool, op, finished):
+                    running += 1
+                else:
+                    done += 1
+                    self.report(done, len(operations), op)
+                    ready.extend(self.release(op, waiting, children))
+            if not running:
+                break
+            op, value, result = finished.get()
+            running -= 1
+            self.finish(op, value, result)
+            done += 1
+            self.report(done, len(operations), op)
+            ready.extend(self.release(op, waiting, children))
+
+    def report(self, done, total, op):
+        if self.progress is not None:
+            self.progress(done, total, op)
+
+    @staticmethod
+    def release(op, waiting, children):
+        '''mark op as finished and return the children which have become ready'''
+        ready = []
+        for child in children[op]:
+            waiting[child].discard(op)
+            if not waiting[child]:
+                ready.append(child)
+        return ready
+
+    def dispatch(self, pool, op, finished):
+        '''start generating op.  returns False if it was already finished locally'''
+        design = self.design
+        value = op.cache_key(design)
+        if op.load_cached_output(design, value):
+            return False
+        if op.parallel and pool is not None:
+            parent_outputs = {}
+            for ref in op.parentrefs():
+                parent_outputs[ref] = [(item.csg, item.name) for item in design.op_from_ref(ref).output]
+            try:
+                data = dumps((op.copy(), parent_outputs), self.layerdef)
+            except (pickle.PicklingError, TypeError, AttributeError):
+                pass
+            else:
+                pool.apply_async(_generate_in_worker, (self.token, self.context, data),
+                                 callback=lambda result: finished.put((op, value, result)),
+                                 error_callback=lambda error: finished.put((op, value, None)))
+                return True
+        op.generate_in_context(design)
+        op.store_cached_output(design, value)
+        return False
+
+    def finish(self, op, value, result):
+        design = self.design
+        if result is None:
+            # the worker failed.  regenerate locally so any error is raised as it would be without the pool
+            op.generate_in_context(design)
+        else:
+            output, owned, attributes = loads(result, self.layerdef)
+            for item, is_owned in zip(output, owned):
+                if is_owned:
+                    item.parent = op
+            op.restore_cache_entry((output, attributes))
+        op.store_cached_output(design, value)
@@ -55,6 +55,30 @@ version = basic_functions.return_formatted_time(
 
 default_buffer_resolution = 4
 
+output_cache_size = 256
+# results of layer buffers, simplifications and other value operations kept for reuse
+layer_memo_size = 512
+# laminates whose keepouts and clearances are kept, by laminate fingerprint
+keepout_cache_size = 64
+# regenerated subdesigns kept for subdesign operations.  each holds a whole design's outputs, so few are kept
+subdesign_cache_size = 8
+disk_output_cache = False
+# identifies the geometry code and entry layout of disk cache entries.  bump it when either changes, so old entries are not reused
+output_cache_format = 1
+disk_output_cache_size = 4096
+regen_workers = 1
+# processes are spawned rather than forked, since the editor regenerates from a background thread
+regen_start_method = 'spawn'
+lazy_regen = False
+background_regen = True
+# run per-layer laminate operations on a shared pool: False, 'thread' or 'process'
+layer_parallel = False
+# 'vectorized' keeps layers in numpy arrays and uses shapely 2's array functions, when shapely 2 is installed
+csg_backend = 'shapely'
+# snap csg geometry to geometry_round_value decimal places so geos operations stay robust
+csg_precision_mode = False
+layer_parallel_workers = None
+
 gui_default_decimals = 6
 
 gui_infinity = 8
@@ -47,7 +47,7 @@ class GenericText(object):
     def to_generic_polygons(self,add_shift = True):
         import idealab_tools.text_to_polygons
         from matplotlib.font_manager import FontProperties
-        from popupcad.filetypes.genericshapes import GenericPoly
+        from popupcad.filetypes.arrayshapes import ArrayPoly
         
         text = self.text
 #        small font scalings actually produce different paths.  use 10pt font as invariant size
@@ -61,8 +61,7 @@ class GenericText(object):
                 if popupcad.flip_y:
                     item[:,1]=-1*item[:,1]+internal_font
                 item*=(4/3)
-                item = item.tolist()
-                generic_polygons.append(GenericPoly.gen_from_point_lists(item,[]))
+                generic_polygons.append(ArrayPoly.gen_from_arrays(item,[]))
 #            
         else:
             generic_polygons = []
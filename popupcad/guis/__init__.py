@@ -8,4 +8,5 @@ Please see LICENSE for full license.
 from . import sketcher
 from . import editor
 #from . import icons don't import automatically because it contains qt code.
-from . import actions
\ No newline at end of file
+from . import actions
+from . import regen_thread
\ No newline at end of file
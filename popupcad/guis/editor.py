@@ -42,6 +42,8 @@ class Editor(popupcad.widgets.widgetcommon.MainGui, qg.QMainWindow):
         """
         super(Editor, self).__init__(parent)
         self.error_log = popupcad.widgets.textwindow.TextWindow()
+        self.regen_thread = None
+        self.cancelled_regen_threads = []
         self.safe_init(parent, **kwargs)
 
     
@@ -224,8 +226,12 @@ class Editor(popupcad.widgets.widgetcommon.MainGui, qg.QMainWindow):
         self.reprocessoperations(None)
         
     def reprocessoperations(self, operations=None):
+        lazy = self.menu_system.actions['project_lazy_reprocess'].isChecked()
+        if popupcad.background_regen and not lazy:
+            self.start_regen_thread(operations)
+            return
         try:
-            self.design.reprocessoperations(operations)
+            self.design.reprocessoperations(operations,lazy = lazy)
             self.operationeditor.refresh()
             self.showcurrentoutput()
             self.view_2d.zoomToFit()
@@ -234,6 +240,53 @@ class Editor(popupcad.widgets.widgetcommon.MainGui, qg.QMainWindow):
         finally:
             self.operationeditor.refresh()
 
+    def start_regen_thread(self, operations=None):
+        previous = self.regen_thread
+        if previous is not None and previous.design is self.design:
+            # whatever the cancelled regen had not adopted yet is still owed
+            operations = previous.merged_scope(operations)
+        self.cancel_regen_thread()
+        thread = popupcad.guis.regen_thread.RegenThread(self.design, operations)
+        thread.progress.connect(self.regen_progress)
+        thread.finished.connect(lambda: self.regen_finished(thread))
+        self.regen_thread = thread
+        thread.start()
+
+    def cancel_regen_thread(self, wait=False):
+        thread = self.regen_thread
+        if thread is not None:
+            thread.cancel()
+            # keep the thread alive until it has wound down
+            self.cancelled_regen_threads.append(thread)
+        if wait:
+            for thread in self.cancelled_regen_threads:
+                thread.wait()
+        self.regen_thread = None
+
+    def regen_progress(self, done, total, name):
+        self.statusBar().showMessage('Regenerating {0} ({1}/{2})'.format(name, done, total))
+
+    def regen_finished(self, thread):
+        if thread is not self.regen_thread:
+            try:
+                self.cancelled_regen_threads.remove(thread)
+            except ValueError:
+                pass
+            return
+        self.regen_thread = None
+        self.statusBar().clearMessage()
+        if thread.design is not self.design:
+            return
+        try:
+            thread.adopt()
+            self.operationeditor.refresh()
+            if thread.error is not None:
+                raise thread.error
+            self.showcurrentoutput()
+            self.view_2d.zoomToFit()
+        finally:
+            self.operationeditor.refresh()
+
     def newfile(self):
         from popupcad.filetypes.layerdef import LayerDef
         import popupcad.filetypes.material2 as materials
@@ -248,16 +301,20 @@ class Editor(popupcad.widgets.widgetcommon.MainGui, qg.QMainWindow):
         if not design is None:
             self.load_design(design)
             if self.menu_system.actions['project_auto_reprocess'].isChecked():
+                # zooms once the, possibly background, regen is done
                 self.reprocessoperations()
-            self.view_2d.zoomToFit()
+            else:
+                self.view_2d.zoomToFit()
         
     def open(self):
         design = Design.open(self)
         if not design is None:
             self.load_design(design)
             if self.menu_system.actions['project_auto_reprocess'].isChecked():
+                # zooms once the, possibly background, regen is done
                 self.reprocessoperations()
-            self.view_2d.zoomToFit()
+            else:
+                self.view_2d.zoomToFit()
 
     def save(self):
         value = self.design.save(self)
@@ -392,6 +449,7 @@ class Editor(popupcad.widgets.widgetcommon.MainGui, qg.QMainWindow):
 
     def closeEvent(self, event):
         if self.checkSafe():
+            self.cancel_regen_thread(wait=True)
             self.error_log.close()
             event.accept()
         else:
@@ -451,7 +509,8 @@ class Editor(popupcad.widgets.widgetcommon.MainGui, qg.QMainWindow):
             raise
         if self.menu_system.actions['project_auto_reprocess'].isChecked():
             self.reprocessoperations()
-        self.view_2d.zoomToFit()
+        else:
+            self.view_2d.zoomToFit()
     
 #    def download_installer(self):
 #        qg.QDesktopServices.openUrl(popupcad.update_url)
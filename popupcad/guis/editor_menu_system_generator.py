@@ -51,6 +51,7 @@ if __name__=='__main__':
     
     action_setup['project_rebuild'] = {'text': '&Rebuild','kwargs': {'icon': 'refresh'}}
     action_setup['project_auto_reprocess'] = {'text': 'Auto Reprocess','is_checkable':True,'is_checked':True}
+    action_setup['project_lazy_reprocess'] = {'text': 'Lazy Reprocess','is_checkable':True,'is_checked':False}
     action_setup['project_layer_order'] = {'text': 'Layer Order...'}
     action_setup['project_laminate_props'] = {'text': 'Laminate Properties...'}
     action_setup['project_sketches'] = {'text': 'Sketches...'}
@@ -61,6 +62,7 @@ if __name__=='__main__':
     
     menu_struct['Project']=['project_rebuild',
                         'project_auto_reprocess',
+                        'project_lazy_reprocess',
                         'project_layer_order',
                         'project_laminate_props',
                         'project_sketches',
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Written by Daniel M. Aukes and CONTRIBUTORS
+Email: danaukes<at>asu.edu.
+Please see LICENSE for full license.
+"""
+
+import qt.QtCore as qc
+from popupcad.filetypes.design import RegenCancelled
+
+
+class RegenThread(qc.QThread):
+
+    '''
+    Regenerates a snapshot of a design away from the gui thread.  The
+    snapshot's outputs are only swapped into the design, all at once, by
+    adopt(), so the design on screen is never partially regenerated.
+    '''
+    progress = qc.Signal(int, int, str)
+
+    def __init__(self, design, operations=None, workers=None, parent=None):
+        super(RegenThread, self).__init__(parent)
+        self.design = design
+        self.snapshot = design.regen_snapshot()
+        self.workers = workers
+        self.cancelled = False
+        self.error = None
+        self.generated = []
+
+        if operations is None:
+            self.requested = None
+            self.operations = None
+        else:
+            self.requested = [op for op in operations if op in design.operations]
+            # operations which were never generated, or only deferred, are regenerated too
+            pending = [op for op in design.operations if op.output_is_deferred() or not hasattr(op, 'output')]
+            refs = [op.id for op in self.requested]
+            refs.extend([op.id for op in pending if op.id not in refs])
+            self.operations = [self.snapshot.op_from_ref(ref) for ref in refs]
+
+    def merged_scope(self, operations):
+        '''the operations still owed by this regen, plus operations.  None stands for every operation'''
+        if self.requested is None or operations is None:
+            return None
+        return self.requested + [op for op in operations if op not in self.requested]
+
+    def cancel(self):
+        '''stop before the next operation.  a cancelled regen is never adopted'''
+        self.cancelled = True
+
+    def report(self, done, total, operation):
+        self.generated.append(operation)
+        if self.cancelled:
+            raise RegenCancelled()
+        self.progress.emit(done, total, str(operation))
+
+    def run(self):
+        try:
+            self.snapshot.reprocessoperations(self.operations, workers=self.workers, lazy=False, progress=self.report)
+        except RegenCancelled:
+            pass
+        except Exception as ex:
+            self.error = ex
+
+    def adopt(self):
+        '''swap the generated outputs into the design.  call from the gui thread once finished.  a failed regen is not adopted'''
+        if not self.cancelled and self.error is None:
+            self.design.adopt_outputs(self.snapshot, self.generated)
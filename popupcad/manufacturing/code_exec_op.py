@@ -11,6 +11,8 @@ from popupcad.widgets.userinput import UserInputIDE
 
 class CodeExecOperation(Operation2):
     name = 'Code Execution Operation'
+    cacheable = False
+    parallel = False
     code = ""    
     
     def __init__(self, *args):
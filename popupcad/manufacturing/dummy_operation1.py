@@ -9,6 +9,7 @@ from popupcad.filetypes.operation2 import Operation2
 
 class DummyOp1(Operation2):
     name = 'None'
+    parallel = False
 
     def __init__(self,laminate):
         super(DummyOp1, self).__init__()
@@ -22,6 +23,9 @@ class DummyOp1(Operation2):
         new.customname = self.customname
         return new
 
+    def parameter_fingerprint(self):
+        return self.laminate.fingerprint()
+
     def operate(self, design):
         return self.laminate
 
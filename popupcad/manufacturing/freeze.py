@@ -7,6 +7,7 @@ Please see LICENSE for full license.
 
 from popupcad.filetypes.laminate import Laminate
 from popupcad.filetypes.operation2 import Operation2
+from popupcad.algorithms.fingerprint import object_fingerprint
 
 import popupcad
 
@@ -73,6 +74,13 @@ class Freeze(Operation2):
         new.customname = self.customname
         return new
 
+    def parameter_fingerprint(self):
+        # the generic laminate is given a new id when it is upgraded on load, which does not change the output.
+        # copies are dumped, since the live layerdef and shapes pick up cached attributes during regen
+        layerdef = self.generic.layerdef
+        geoms = [[geom.copy(identical=True) for geom in self.generic.geoms[layer]] for layer in layerdef.layers]
+        return object_fingerprint([self.operation_link1, self.outputref, layerdef.copy(), geoms])
+
     def operate(self, design):
         layerdef = design.return_layer_definition()
         csg = Laminate(layerdef)
@@ -217,6 +217,7 @@ class MainWidget(qg.QDialog):
 class JointOperation3(Operation2, LayerBasedOperation):
     name = 'JointOp'
     resolution = 2
+    cached_attributes = ['fixed_bodies','bodies_generic','connections','all_joint_props','layer_def']
 
     def copy(self):
         new = type(self)(
@@ -368,7 +369,7 @@ class JointOperation3(Operation2, LayerBasedOperation):
             connections[line] = []
             connections2[line] = []
             for body, body_generic in zip(bodies, bodies_generic):
-                if not geom.intersection(body).isEmpty():
+                if geom.intersects(body):
                     connections[line].append(body_generic)
                     connections2[line].append(body)
         for line, geoms in connections2.items():
@@ -377,7 +378,7 @@ class JointOperation3(Operation2, LayerBasedOperation):
         self.fixed_bodies = []
         fixed_csg = []
         for body, body_generic in zip(bodies, bodies_generic):
-            if not fixed.intersection(body).isEmpty():
+            if fixed.intersects(body):
                 self.fixed_bodies.append(body_generic)
                 fixed_csg.append(body)
 
@@ -9,6 +9,7 @@ import qt.QtCore as qc
 import qt.QtGui as qg
 import popupcad
 from popupcad.filetypes.operation2 import Operation2
+from popupcad.algorithms.fingerprint import digest
 from popupcad.widgets.table_editor_popup import Table, SingleItemListElement,IntegerElement,Row, TableControl, DraggableTreeElement,Delegate
 from popupcad.widgets.listmanager import DesignListManager
 
@@ -230,11 +231,28 @@ class SubOperation2(Operation2):
             self)
         return dialog
 
-    def generate(self, design):
+    def evaluation_key(self, design):
+        '''digest of everything the regenerated subdesign depends on.  it leaves out the outputs, so identical instances share it'''
+        items = ['subdesign', design.subdesign_fingerprint(self.design_links['source'][0]), design.layerdef_fingerprint()]
+        items.extend([(item.ref1, design.sketch_fingerprint(item.ref2)) for item in self.sketch_list])
+        items.extend([(item.ref1, design.op_from_ref(item.ref2[0]).output_fingerprint(), item.ref2[1], item.shift) for item in self.input_list])
+        return digest(*items)
+
+    def evaluate_subdesign(self, design):
+        key = self.evaluation_key(design)
+        try:
+            return design.subdesign_cache[key]
+        except KeyError:
+            subdesign = self.build_subdesign(design)
+            subdesign.reprocessoperations()
+            design.subdesign_cache[key] = subdesign
+            return subdesign
+
+    def build_subdesign(self, design):
         from popupcad.manufacturing.dummy_operation1 import DummyOp1
         
         subdesign_orig = design.subdesigns[self.design_links['source'][0]]
-        subdesign = subdesign_orig.copy_yaml()
+        subdesign = subdesign_orig.clone()
 
         sketches = design.sketches.copy()
         for key,value in sketches.items():
@@ -242,7 +260,6 @@ class SubOperation2(Operation2):
         subdesign.sketches.update(sketches)
 
         layerdef_subdesign = subdesign.return_layer_definition()
-        layerdef_design = design.return_layer_definition()
 
         for sketch_data in self.sketch_list:
             from_ref = sketch_data.ref1
@@ -260,8 +277,11 @@ class SubOperation2(Operation2):
             to_ref2 = (dummy_op.id,0)
             subdesign.insert_operation(0, dummy_op)
             subdesign.replace_op_refs_force(from_ref, to_ref2)
+        return subdesign
 
-        subdesign.reprocessoperations()
+    def generate(self, design):
+        subdesign = self.evaluate_subdesign(design)
+        layerdef_design = design.return_layer_definition()
 
         self.output = []
         for output_data in self.output_list:
@@ -269,6 +289,9 @@ class SubOperation2(Operation2):
             csg= new_output.csg
             csg2 = csg.switch_layer_defs(layerdef_design)
             csg3 = popupcad.algorithms.manufacturing_functions.shift_flip_rotate(csg2,output_data.shift,False,False)
+            # the evaluated subdesign is shared through the output cache, so each output gets layers of its own
+            for layer, value in csg3.layer_sequence.items():
+                csg3.layer_sequence[layer] = value.copy()
             output2 = popupcad.filetypes.operationoutput.OperationOutput(csg3,new_output.name)
             self.output.append(output2)
 
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Written by Daniel M. Aukes and CONTRIBUTORS
+Email: danaukes<at>asu.edu.
+Please see LICENSE for full license.
+
+Randomized checks that the closed-form mass properties, the batch point
+predicates, the bucketed unique geometry search used by getcontrols and the
+one-union-per-layer laminate reduction agree with the per-item versions they
+replaced.  The reduction may start rings at other vertices, so it is
+compared by area rather than vertex by vertex.
+"""
+import os
+import glob
+import random
+import numpy
+import popupcad
+from popupcad.algorithms import points
+from popupcad.filetypes.design import Design
+from popupcad.filetypes.genericlaminate import GenericLaminate
+from popupcad.filetypes.genericshapes import GenericPoly
+from popupcad.filetypes.laminate import Laminate
+from popupcad.filetypes.operationoutput import OperationOutput
+
+
+def mass_properties_by_triangles(generic_laminate):
+    '''the per shape triangulation laminate_mass_properties replaced'''
+    zvalues = generic_laminate.layerdef.z_values2()
+    volume_total = 0
+    center_of_mass_accumulator = 0
+    next_args = []
+    mass_total = 0
+    for layer in generic_laminate.layers():
+        layer_volume = 0
+        density = layer.density
+        z_lower = zvalues[layer]['lower']
+        z_upper = zvalues[layer]['upper']
+        for geom in generic_laminate.geoms[layer]:
+            area, centroid, volume, mass, tris = geom.mass_properties(density, z_lower, z_upper)
+            volume_total += volume
+            layer_volume += volume
+            center_of_mass_accumulator += volume * centroid * density
+            next_args.append((geom, (density, z_lower, z_upper, tris)))
+        mass_total += layer_volume * density
+    center_of_mass = center_of_mass_accumulator / mass_total
+    I = 0
+    for geom, args in next_args:
+        I += geom.inertia_tensor(center_of_mass, *args)
+    return volume_total, mass_total, center_of_mass, I
+
+
+def unique_geoms_by_pairs(geoms):
+    '''the pairwise search OperationOutput.unique_geoms replaced'''
+    unique_geoms = []
+    for geom in geoms:
+        if not any([geom.is_equal(geom2) for geom2 in unique_geoms]):
+            unique_geoms.append(geom)
+    return unique_geoms
+
+
+def fold_left(laminates, function):
+    '''the one pair at a time reduction Laminate.unaryoperation replaced'''
+    laminates = laminates[:]
+    lsout = laminates.pop(0)
+    while laminates:
+        lsout = lsout.binaryoperation(laminates.pop(0), function)
+    return lsout
+
+
+def random_rectangle(tolerance):
+    x, y = random.randint(0, 20), random.randint(0, 20)
+    w, h = random.choice([1, 2, 3]), random.choice([1, 2, 3])
+    jitter = random.choice([0, 0, tolerance * .6, -tolerance * .6, tolerance * 1.5])
+    exterior = [(x + jitter, y), (x + w, y + jitter), (x + w, y + h), (x, y + h)]
+    interiors = []
+    if w > 1 and h > 1 and random.random() < .5:
+        interiors.append([(x + .25, y + .25), (x + .25, y + .75), (x + .75, y + .75), (x + .75, y + .25)])
+    return GenericPoly.gen_from_point_lists(exterior, interiors)
+
+
+def random_laminates(layerdef, count, tolerance):
+    for ii in range(count):
+        geoms = dict([(layer, [random_rectangle(tolerance) for jj in range(random.randint(0, 5))]) for layer in layerdef.layers])
+        if any(geoms.values()):
+            yield GenericLaminate(layerdef, geoms)
+
+
+def check_mass_properties(laminates):
+    for laminate in laminates:
+        if not all([isinstance(geom, GenericPoly) for geom in laminate.all_geoms()]):
+            continue
+        try:
+            expected = mass_properties_by_triangles(laminate)
+        except Exception:
+            # the triangulation fails on some shapes, so there is nothing to compare against
+            continue
+        result = laminate.mass_properties()
+        for item1, item2 in zip(expected, result):
+            if not numpy.allclose(item1, item2, rtol=1e-7, atol=1e-12):
+                return False
+    return True
+
+
+def check_unary_operations(designs, count):
+    for d in designs:
+        laminates = [output.csg for operation in d.operations for output in operation.output]
+        for ii in range(count):
+            chosen = random.sample(laminates, min(len(laminates), random.randint(2, 6)))
+            for function in ['union', 'difference', 'symmetric_difference', 'intersection']:
+                try:
+                    expected = fold_left(chosen, function)
+                    result = Laminate.unaryoperation(chosen, function)
+                    areas = [(expected.layer_sequence[layer].merged().symmetric_difference(result.layer_sequence[layer].merged()).area,
+                              expected.layer_sequence[layer].merged().area) for layer in d.return_layer_definition().layers]
+                except Exception:
+                    # combinations geos cannot compute one way or the other are skipped
+                    continue
+                if any([difference > 1e-9 * max(area, 1) for difference, area in areas]):
+                    return False
+    return True
+
+
+def check_point_predicates(count, tolerance):
+    for ii in range(count):
+        pts = []
+        for jj in range(random.randint(0, 8)):
+            if pts and random.random() < .4:
+                base = random.choice(pts)
+                pts.append((base[0] + random.choice([0, tolerance * .5, tolerance * 2]), base[1]))
+            else:
+                pts.append((random.randint(0, 3) * 1., random.randint(0, 3) * 1.))
+        query = (random.randint(0, 3) + random.choice([0, tolerance * .5]), 1.)
+        if points.points_in_points([query], pts, tolerance)[0] != points.pointinpoints(query, pts, tolerance):
+            return False
+        if len(pts) < 2:
+            continue
+        lines = list(zip(pts, pts[1:] + pts[:1]))
+        on = points.points_on_lines(pts, lines, tolerance).tolist()
+        if on != [[points.point_on_line(point, line, tolerance) for line in lines] for point in pts]:
+            return False
+        within = points.points_within_lines(pts, lines, tolerance).tolist()
+        if within != [[points.point_within_line(point, line, tolerance) for line in lines] for point in pts]:
+            return False
+    return True
+
+
+def check_unique_geoms(laminates):
+    for laminate in laminates:
+        geoms = laminate.all_geoms()
+        # repeat some shapes, so there are duplicates to find
+        geoms = geoms + [geom.copy() for geom in geoms[::2]]
+        expected = [geom.id for geom in unique_geoms_by_pairs(geoms)]
+        if [geom.id for geom in OperationOutput.unique_geoms(geoms)] != expected:
+            return False
+    return True
+
+
+if __name__=='__main__':
+    random.seed(0)
+    tolerance = popupcad.distinguishable_number_difference
+
+    designs = []
+    laminates = []
+    for filename in sorted(glob.glob(os.path.join(popupcad.test_file_dir, '*.cad'))):
+        d = Design.load_yaml(filename)
+        d.reprocessoperations()
+        designs.append(d)
+        for operation in d.operations:
+            for output in operation.output:
+                if not output.csg.isEmpty():
+                    laminates.append(output.generic_laminate())
+    layerdef = d.return_layer_definition()
+    laminates.extend(random_laminates(layerdef, 200, tolerance))
+
+    failed = []
+    if not check_mass_properties(laminates):
+        failed.append('mass properties')
+    if not check_point_predicates(3000, tolerance):
+        failed.append('point predicates')
+    if not check_unique_geoms(laminates):
+        failed.append('unique geoms')
+    if not check_unary_operations(designs, 20):
+        failed.append('unary operations')
+
+    print('failed: '+str(failed))
+
+    if len(failed)>0:
+        raise(Exception('some checks failed.'))